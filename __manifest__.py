@@ -13,13 +13,14 @@
     'website': "http://www.horizontrailers.com",
     'sequence': 1,
 
-    'version': '1.0',
+    'version': '1.6',
     
     'depends': ['base', 'web', 'mail', 'hr'],
 
     'data': [
     'security/ir.model.access.csv',  
     'security/boards_security.xml', 
+    'data/ir_cron.xml',
     'views/dynamic_field_wizard_view.xml', 
     'views/boards_view.xml',   
     'views/delete_field_wizard_view.xml',
@@ -30,7 +31,10 @@
     'views/subtask_activity_view.xml',
     'views/add_field_subtask_view.xml',
     'views/field_tree_groups_wizard_view.xml',
-    'views/delete_board_file_wizard_view.xml'
+    'views/delete_board_file_wizard_view.xml',
+    'views/field_batch_wizard_view.xml',
+    'views/field_retire_wizard_view.xml',
+    'views/table_maintenance_view.xml'
     ],
     'images': ['static/description/icon.png'],
     'installable': True,
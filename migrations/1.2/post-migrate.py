@@ -0,0 +1,59 @@
+from odoo import api, SUPERUSER_ID
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Tabla -> (modelo, columna de alcance)
+LEGACY_TABLES = {
+    'task_board': ('task.board', 'department_id'),
+    'subtask_board': ('subtask.board', 'task_id'),
+}
+
+
+def migrate(cr, version):
+    """Pasa la metadata JSON ``dynamic_fields_data`` a task.planner.field.definition"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    Definition = env['task.planner.field.definition']
+    for table, (model_name, scope_column) in LEGACY_TABLES.items():
+        cr.execute("""
+            SELECT 1 FROM information_schema.columns
+             WHERE table_name = %s AND column_name = 'dynamic_fields_data'
+        """, [table])
+        if not cr.fetchone():
+            continue
+        cr.execute(f"""
+            SELECT {scope_column}, dynamic_fields_data
+              FROM {table}
+             WHERE dynamic_fields_data IS NOT NULL
+          ORDER BY id
+        """)
+        existing = set(Definition.with_context(active_test=False).search([
+            ('model', '=', model_name)
+        ]).mapped('name'))
+        for scope_id, data in cr.fetchall():
+            try:
+                field_data = json.loads(data)
+            except (TypeError, ValueError):
+                continue
+            for field_name, config in field_data.items():
+                if not isinstance(config, dict) or field_name in existing:
+                    continue
+                if not env['ir.model.fields'].search_count([('model', '=', model_name), ('name', '=', field_name)]):
+                    continue
+                if model_name == 'task.board':
+                    board = env['boards.planner'].browse(config.get('board_id') or scope_id)
+                    task = None
+                else:
+                    board, task = None, env['task.board'].browse(scope_id)
+                Definition._register_definition(
+                    model_name, field_name, config.get('label'), config.get('type'),
+                    board=board.exists() if board else None,
+                    task=task.exists() if task else None,
+                    selection_values=config.get('options') or False,
+                )
+                existing.add(field_name)
+        cr.execute(f'ALTER TABLE "{table}" DROP COLUMN dynamic_fields_data')
+        _logger.info("Metadata de campos dinámicos de %s migrada", table)
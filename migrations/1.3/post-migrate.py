@@ -0,0 +1,14 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Sustituye las vistas por campo y tablero por una vista por tablero"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    env['ir.ui.view'].search([
+        ('model', '=', 'task.board'),
+        ('name', '=like', 'task.board.tree.dynamic.%'),
+    ]).unlink()
+    boards = env['task.planner.field.definition'].search([('model', '=', 'task.board')]).board_id
+    env['task.board']._regenerate_board_tree_views(boards)
@@ -0,0 +1,15 @@
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    """Rellena el índice de vistas de los campos dinámicos existentes"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    Definition = env['task.planner.field.definition']
+    for definition in Definition.with_context(active_test=False).search([('view_ids', '=', False)]):
+        views = Definition._get_field_views(definition.model, definition.name)
+        if definition.model == 'task.board':
+            views |= definition.board_id.tree_view_id
+        if views:
+            definition.view_ids = [(4, view.id) for view in views]
@@ -0,0 +1,22 @@
+from odoo import api, SUPERUSER_ID
+
+OPTION_COLUMNS = [f'selection_option_{i}' for i in range(1, 21)] + ['selection_option_count']
+
+# Columnas de definición de campos que ya no existen en los modelos
+OBSOLETE_COLUMNS = {
+    'subtask_activity': OPTION_COLUMNS + [
+        'dynamic_field_name', 'dynamic_field_label', 'dynamic_field_type', 'default_value',
+    ],
+    'add_field_subtask_wizard': OPTION_COLUMNS,
+    'dynamic_field_wizard': OPTION_COLUMNS,
+    'field_tree_groups_wizard': OPTION_COLUMNS,
+}
+
+
+def migrate(cr, version):
+    """Elimina las columnas de opciones con un único DROP por tabla"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    for table, columns in OBSOLETE_COLUMNS.items():
+        env['task.planner.ddl']._drop_existing_columns(table, columns)
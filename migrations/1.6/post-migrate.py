@@ -0,0 +1,22 @@
+from odoo import api, SUPERUSER_ID
+
+# Valores de configuración de los asistentes que se guardaban en cada fila;
+# ahora viven en los modelos transitorios de los asistentes
+OBSOLETE_COLUMNS = {
+    'task_board': [
+        'apply_to_specific_task', 'dynamic_field_name', 'dynamic_field_label', 'dynamic_field_type',
+        'selection_options', 'field_info', 'dynamic_field_to_remove',
+    ],
+    'subtask_board': [
+        'dynamic_field_name', 'dynamic_field_label', 'dynamic_field_type', 'field_info',
+    ],
+}
+
+
+def migrate(cr, version):
+    """Elimina las columnas de configuración de los asistentes con un único DROP por tabla"""
+    if not version:
+        return
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    for table, columns in OBSOLETE_COLUMNS.items():
+        env['task.planner.ddl']._drop_existing_columns(table, columns)
@@ -1,4 +1,13 @@
+from . import sequence_mixin
+from . import dynamic_values_mixin
+from . import ddl_executor
+from . import ir_model_fields
+from . import table_maintenance
+from . import storage_advisor
+from . import field_definition
 from . import boards
+from . import hr_employee
+from . import hr_department
 from . import task
 from . import subtask
 from . import subtask_activity
@@ -8,3 +17,7 @@ from . import add_field_subtask_wizard
 from . import delete_dynamic_field_wizard
 from . import field_tree_groups_wizard
 from . import delete_board_file_wizard
+from . import remove_field_selection_wizard
+from . import field_batch_wizard
+from . import field_retire_wizard
+from . import field_option_line
@@ -1,9 +1,8 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError, ValidationError
+from .ddl_executor import COLUMN_TYPES
 import re
 import logging
-import json
-from datetime import datetime
 
 _logger = logging.getLogger(__name__)
 
@@ -32,34 +31,7 @@ class AddFieldSubtaskWizard(models.TransientModel):
         default='char' 
     )
     
-    # Campos para manejar opciones de selección
-    selection_option_count = fields.Integer(
-        string="Número de Opciones",
-        default=0,
-        compute='_compute_selection_option_count',
-        store=True
-    )
-    
-    selection_option_1 = fields.Char(string="Opción 1")
-    selection_option_2 = fields.Char(string="Opción 2")
-    selection_option_3 = fields.Char(string="Opción 3")
-    selection_option_4 = fields.Char(string="Opción 4")
-    selection_option_5 = fields.Char(string="Opción 5")
-    selection_option_6 = fields.Char(string="Opción 6")
-    selection_option_7 = fields.Char(string="Opción 7")
-    selection_option_8 = fields.Char(string="Opción 8")
-    selection_option_9 = fields.Char(string="Opción 9")
-    selection_option_10 = fields.Char(string="Opción 10")
-    selection_option_11 = fields.Char(string="Opción 11")
-    selection_option_12 = fields.Char(string="Opción 12")
-    selection_option_13 = fields.Char(string="Opción 13")
-    selection_option_14 = fields.Char(string="Opción 14")
-    selection_option_15 = fields.Char(string="Opción 15")
-    selection_option_16 = fields.Char(string="Opción 16")
-    selection_option_17 = fields.Char(string="Opción 17")
-    selection_option_18 = fields.Char(string="Opción 18")
-    selection_option_19 = fields.Char(string="Opción 19")
-    selection_option_20 = fields.Char(string="Opción 20")
+    option_line_ids = fields.One2many('dynamic.field.option.line', 'add_wizard_id', string='Opciones de Selección')
     
     # Campo que apunta a subtask.board
     subtask_id = fields.Many2one(
@@ -79,44 +51,6 @@ class AddFieldSubtaskWizard(models.TransientModel):
     default_value = fields.Text(string="Valor por Defecto para Campo")
     field_info = fields.Text(string="Información del Campo", readonly=True)
 
-    @api.depends('field_type')
-    def _compute_selection_option_count(self):
-        """Calcula el número de opciones a mostrar basado en el tipo de campo"""
-        for wizard in self:
-            if wizard.field_type == 'selection':
-                # Si es tipo selección, mostrar al menos 1 opción
-                if wizard.selection_option_count < 1:
-                    wizard.selection_option_count = 1
-            else:
-                # Para otros tipos, no mostrar opciones
-                wizard.selection_option_count = 0
-
-    @api.onchange('field_type')
-    def _onchange_field_type(self):
-        """Maneja el cambio en el tipo de campo"""
-        if self.field_type != 'selection':
-            self.selection_option_count = 0
-
-    def action_add_selection_option(self):
-        """Añade una nueva opción al campo de selección"""
-        self.ensure_one()
-        if self.field_type != 'selection':
-            raise UserError(_("Solo puede agregar opciones a campos de tipo selección"))
-        
-        if self.selection_option_count < 20:  # Aumentado a 20 opciones máximas
-            self.selection_option_count += 1
-        else:
-            raise UserError(_("Máximo 20 opciones permitidas"))
-        
-        return {
-            'type': 'ir.actions.act_window',
-            'view_mode': 'form',
-            'res_id': self.id,
-            'res_model': self._name,
-            'target': 'new',
-            'context': self.env.context,
-        }
-
     @api.model
     def _default_subtask_id(self):
         """Obtiene la subtarea del contexto"""
@@ -135,10 +69,6 @@ class AddFieldSubtaskWizard(models.TransientModel):
         _logger.info("✅ Wizard ejecutado para subtask.board ID: %s", self.subtask_id.id)
         _logger.info("✅ Nombre de Subtarea: %s", self.subtask_id.name)
 
-        # Validaciones adicionales
-        if self.field_type == 'selection' and self.selection_option_count < 1:
-            raise UserError(_("¡Error! Debe ingresar al menos una opción para campos de selección"))
-
         # Generar nombre técnico con prefijo
         field_name = self._generate_field_name()
 
@@ -151,17 +81,7 @@ class AddFieldSubtaskWizard(models.TransientModel):
         # Preparar opciones de selección si es necesario
         selection_values = False
         if self.field_type == 'selection':
-            options = []
-            for i in range(1, self.selection_option_count + 1):
-                option_value = getattr(self, f'selection_option_{i}', False)
-                if option_value and option_value.strip():
-                    # Usar el mismo valor para clave y etiqueta si no se especifica separador
-                    if ':' in option_value:
-                        key, val = option_value.split(':', 1)
-                        options.append((key.strip(), val.strip()))
-                    else:
-                        options.append((option_value.strip(), option_value.strip()))
-            
+            options = self.option_line_ids._get_selection()
             if not options:
                 raise UserError(_("Debe ingresar al menos una opción válida para el campo de selección"))
                 
@@ -174,15 +94,15 @@ class AddFieldSubtaskWizard(models.TransientModel):
             # 2. Registrar el campo en ir.model.fields
             self._register_field_in_ir(field_name, selection_values)
 
-            # 3. Actualizar vistas
+            # 3. Almacenar metadatos del campo
+            self._store_field_metadata(field_name, selection_values)
+
+            # 4. Actualizar vistas
             self._update_views(field_name)
 
-            # 4. Limpiar cachés
+            # 5. Limpiar cachés
             self._safe_cache_clear()
 
-            # 5. Almacenar metadatos en la subtarea relacionada
-            self._store_field_metadata(field_name, selection_values)
-
             _logger.info("✅ Campo %s creado exitosamente para actividades de la subtarea %s", 
                         field_name, self.subtask_id.name)
 
@@ -196,7 +116,7 @@ class AddFieldSubtaskWizard(models.TransientModel):
             _logger.error("❌ Error creando campo: %s", str(e))
             # Revertir cambios si hay error
             try:
-                self.env.cr.execute(f"ALTER TABLE subtask_activity DROP COLUMN IF EXISTS {field_name}")
+                self.env['task.planner.ddl']._drop_columns_after_commit('subtask_activity', [field_name])
                 
                 # Eliminar registro en ir.model.fields si se creó
                 field_record = self.env['ir.model.fields'].search([
@@ -219,50 +139,11 @@ class AddFieldSubtaskWizard(models.TransientModel):
             raise UserError(_("Error al crear campo: %s") % str(e))
 
     def _store_field_metadata(self, field_name, selection_values=False):
-        """Store field configuration in JSON con manejo de datetime"""
-        try:
-            # Convertir datetime a string ISO para serialización JSON
-            created_at = fields.Datetime.now()
-            if hasattr(created_at, 'isoformat'):
-                created_at = created_at.isoformat()
-            
-            field_data = {
-                'name': field_name,
-                'label': self.field_label,
-                'type': self.field_type,
-                'created_at': created_at,
-                'created_by': self.env.user.id,
-            }
-            
-            # Añadir opciones de selección si es el caso
-            if self.field_type == 'selection' and selection_values:
-                # Convertir de string a lista si es necesario
-                if isinstance(selection_values, str):
-                    try:
-                        selection_values = eval(selection_values)
-                    except:
-                        selection_values = []
-                
-                field_data['options'] = selection_values
-            
-            # Obtener o crear datos existentes
-            current_data = {}
-            if self.subtask_id.dynamic_fields_data:
-                try:
-                    current_data = json.loads(self.subtask_id.dynamic_fields_data)
-                except json.JSONDecodeError:
-                    current_data = {}
-                    _logger.warning("Invalid JSON in dynamic_fields_data, resetting")
-            
-            # Actualizar con nuevos datos
-            current_data[field_name] = field_data
-            
-            # Serializar usando el método seguro
-            self.subtask_id.dynamic_fields_data = json.dumps(current_data, default=str)
-            
-        except Exception as e:
-            _logger.error("Metadata storage failed: %s", str(e))
-            raise UserError(_("Error storing field metadata: %s") % str(e))
+        """Registra la definición del campo (global a subtask.activity)"""
+        self.env['task.planner.field.definition']._register_definition(
+            'subtask.activity', field_name, self.field_label, self.field_type,
+            selection_values=selection_values,
+        )
 
     def _field_already_exists(self, field_name):
         """Verifica si el campo ya existe en la base de datos o en ir.model.fields"""
@@ -311,27 +192,19 @@ class AddFieldSubtaskWizard(models.TransientModel):
 
     def _create_column_in_db(self, field_name):
         """Crea la columna física en la base de datos de subtask.activity"""
-        column_type = {
-            'char': 'VARCHAR(255)',
-            'integer': 'INTEGER',
-            'float': 'NUMERIC(16,2)',
-            'boolean': 'BOOLEAN',
-            'date': 'DATE',
-            'datetime': 'TIMESTAMP',
-            'selection': 'VARCHAR(255)'
-        }.get(self.field_type)
+        column_type = COLUMN_TYPES.get(self.field_type)
         
         if not column_type:
             raise UserError(_("Tipo de campo no válido: %s") % self.field_type)
         
         try:
-            query = f"""
-                ALTER TABLE subtask_activity 
-                ADD COLUMN {field_name} {column_type}
-            """
-            self.env.cr.execute(query)
+            self.env['task.planner.ddl']._add_columns(
+                'subtask_activity', [(field_name, column_type)], if_not_exists=False
+            )
             _logger.info("✅ Columna %s creada en tabla subtask_activity", field_name)
             
+        except UserError:
+            raise
         except Exception as e:
             _logger.error("❌ Error creando columna: %s", str(e))
             if "already exists" in str(e):
@@ -369,6 +242,7 @@ class AddFieldSubtaskWizard(models.TransientModel):
     def _update_views(self, field_name):
         """Actualiza las vistas de subtask.activity para incluir el nuevo campo"""
         try:
+            views = self.env['ir.ui.view']
             field_label = self.field_label or self.field_name
 
             planner_form_view = self.env.ref('task_planner.activity_planner_subtask_form')
@@ -388,7 +262,7 @@ class AddFieldSubtaskWizard(models.TransientModel):
                 if existing_planner_view:
                     existing_planner_view.unlink()
 
-                self.env['ir.ui.view'].create({
+                views |= self.env['ir.ui.view'].create({
                     'name': f'subtask.planner.form.dynamic.{field_name}',
                     'model': 'subtask.board',
                     'inherit_id': planner_form_view.id,
@@ -409,7 +283,7 @@ class AddFieldSubtaskWizard(models.TransientModel):
                 </data>
                 """
                 
-                self.env['ir.ui.view'].create({
+                views |= self.env['ir.ui.view'].create({
                     'name': f'subtask.activity.form.dynamic.{field_name}',
                     'model': 'subtask.activity',
                     'inherit_id': form_view.id,
@@ -429,7 +303,7 @@ class AddFieldSubtaskWizard(models.TransientModel):
                 </data>
                 """
                 
-                self.env['ir.ui.view'].create({
+                views |= self.env['ir.ui.view'].create({
                     'name': f'subtask.activity.tree.dynamic.{field_name}',
                     'model': 'subtask.activity',
                     'inherit_id': tree_view.id,
@@ -440,22 +314,12 @@ class AddFieldSubtaskWizard(models.TransientModel):
 
             _logger.info("✅ Vistas actualizadas con campo %s", field_name)
 
+            self.env['task.planner.field.definition']._link_views('subtask.activity', field_name, views)
+
         except Exception as e:
             _logger.error("❌ Error actualizando vistas: %s", str(e))
             raise UserError(_("Error al actualizar vistas. Consulte los logs."))
    
     def _safe_cache_clear(self):
         """Limpieza segura de cachés"""
-        try:
-            # Limpiar cachés básicos
-            self.env.invalidate_all()
-            if hasattr(self.env.registry, 'clear_cache'):
-                self.env.registry.clear_cache()
-            
-            # Limpiar cachés de vistas
-            self.env['ir.ui.view'].clear_caches()
-              
-            _logger.info("✅ Cachés limpiados correctamente")
-            
-        except Exception as e:
-            _logger.warning("⚠️ Error limpiando cachés: %s", str(e))
\ No newline at end of file
+        self.env['ir.model.fields']._refresh_planner_model('subtask.activity')
@@ -1,5 +1,6 @@
-from odoo import models, api, fields
+from odoo import models, api, fields, tools
 from odoo.exceptions import UserError
+from collections import namedtuple
 
 STATES = [
     ('new', 'New'),
@@ -7,17 +8,101 @@ STATES = [
     ('done', 'Done'),
     ('stuck', 'Stuck')
 ]
+
+# Acceso de un usuario a los tableros, resuelto una vez y guardado en caché
+BoardAccess = namedtuple('BoardAccess', ['employee_id', 'is_management', 'member_board_ids', 'department_board_ids'])
+
 class Boards(models.Model):
     _name = 'boards.planner'
     _description = 'Model designed to create or modify tasks assigned to employees'
     
     name = fields.Char(string="Tablero")
-    department_id = fields.Many2one('hr.department', string='Departamento')
+    department_id = fields.Many2one('hr.department', string='Departamento', ondelete='set null')
     responsible_person_id = fields.Many2one('hr.employee', string='Responsable', compute='_compute_responsible_person', store=True)
     pick_from_dept = fields.Boolean('Solo miembros del departamento')
     member_ids = fields.Many2many('hr.employee', string='Miembros')
     task_ids = fields.One2many('task.board', 'department_id', invisible=True, string='Grupos')
+    last_group_sequence = fields.Integer(
+        string='Último número de grupo',
+        default=0,
+        readonly=True,
+        copy=False,
+        help='Contador usado para numerar los grupos de este tablero'
+    )
+    tree_view_id = fields.Many2one(
+        'ir.ui.view',
+        string='Vista de grupos',
+        ondelete='set null',
+        readonly=True,
+        copy=False,
+        help='Vista tree generada con los campos dinámicos de este tablero'
+    )
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        if {'member_ids', 'pick_from_dept', 'department_id'} & set(vals):
+            self.env.registry.clear_cache()
+        return result
+
+    def unlink(self):
+        board_views = self.sudo().tree_view_id
+        # Los grupos se borran en cascada en la base de datos
+        groups = self.sudo().task_ids
+        scopes = groups._get_sequence_scopes()
+        result = super().unlink()
+        board_views.unlink()
+        groups._drop_sequence_scopes(scopes)
+        self.env.registry.clear_cache()
+        return result
+
+    @api.model
+    @tools.ormcache('self.env.uid')
+    def _get_user_board_access(self):
+        """Resuelve una vez por usuario si es de Management y a qué tableros accede.
+
+        La caché se invalida al cambiar tableros, departamentos (nombre,
+        responsable) o la asignación de empleados a departamentos.
+        """
+        employee = self.env.user.employee_id
+        if not employee:
+            return BoardAccess(False, False, frozenset(), frozenset())
+
+        management_dept = self.env['hr.department'].sudo().search([('name', '=', 'Management')], limit=1)
+        is_management = bool(employee.department_id and management_dept and employee.department_id == management_dept)
+
+        Boards = self.sudo()
+        member_board_ids = frozenset(Boards.search([('member_ids', 'in', employee.ids)]).ids)
+        department_board_ids = frozenset()
+        if employee.department_id:
+            department_board_ids = frozenset(Boards.search([('department_id', '=', employee.department_id.id)]).ids)
+        return BoardAccess(employee.id, is_management, member_board_ids, department_board_ids)
+
+    def _check_board_access(self, message):
+        """Lanza UserError si el usuario no es miembro de todos los tableros ni de Management"""
+        access = self._get_user_board_access()
+        if not access.employee_id:
+            raise UserError("No se pudo identificar al empleado actual.")
+        if not access.is_management and not set(self.ids) <= access.member_board_ids:
+            raise UserError(message)
+
+    @api.model
+    @tools.ormcache('board_id')
+    def _get_allowed_member_ids(self, board_id):
+        """Empleados que pueden ser responsables en el tablero (en caché).
+
+        Devuelve una tupla de ids, o None si el tablero no restringe miembros.
+        """
+        board = self.sudo().browse(board_id).exists()
+        if not board or not board.pick_from_dept:
+            return None
+        return tuple(board.member_ids.ids)
+
     @api.depends('department_id', 'department_id.manager_id')
     def _compute_responsible_person(self):
         for record in self:
@@ -27,17 +112,7 @@ class Boards(models.Model):
                 record.responsible_person_id = False
 
     def delete_cards(self):
-        employee = self.env.user.employee_id
-        if not employee:
-            raise UserError("No se pudo identificar al empleado actual.")
-        
-        management_dept = self.env['hr.department'].search([('name', '=', 'Management')], limit=1)
-        
-        # Verificar si el empleado es del departamento Management
-        is_management = employee.department_id and management_dept and employee.department_id.id == management_dept.id
-        
-        if employee not in self.member_ids and not is_management:
-            raise UserError("No tienes permisos para eliminar este registro.")
+        self._check_board_access("No tienes permisos para eliminar este registro.")
         
         self.unlink()
         return {'type': 'ir.actions.client', 'tag': 'reload'}
@@ -47,28 +122,14 @@ class Boards(models.Model):
         Abre la vista tree para ver únicamente los grupos creados.
         """
         self.ensure_one()
-    
-        employee = self.env.user.employee_id
-        if not employee:
-            raise UserError("No se pudo identificar al empleado actual.")
-        
-        management_dept = self.env['hr.department'].search([('name', '=', 'Management')], limit=1)
-        
-        # Verificar si el empleado es del departamento Management
-        is_management = employee.department_id and management_dept and employee.department_id.id == management_dept.id
-        
-        # Verificar acceso: debe ser miembro O ser del departamento Management
-        has_access = employee in self.member_ids or is_management
-        
-        if not has_access:
-            raise UserError("No tienes acceso a este tablero.")
+        self._check_board_access("No tienes acceso a este tablero.")
     
         return {
             'type': 'ir.actions.act_window',
             'name': f'Tablero: {self.name}',
             'res_model': 'task.board',
             'view_mode': 'tree',
-            'view_id': self.env.ref('task_planner.activity_planner_task_view_tree').id,
+            'view_id': (self.sudo().tree_view_id or self.env.ref('task_planner.activity_planner_task_view_tree')).id,
             'target': 'current',
             'domain': [('department_id', '=', self.id)],
             'context': {
@@ -96,30 +157,9 @@ class Boards(models.Model):
 
     @api.model
     def _get_accessible_boards(self):
-        employee = self.env.user.employee_id
-        if not employee or not employee.department_id:
-            return self.env['boards.planner']
-        
-        management_dept = self.env['hr.department'].search([('name', '=', 'Management')], limit=1)
-        
-        # Verificar si el empleado es del departamento Management
-        is_management = management_dept and employee.department_id.id == management_dept.id
-        
-        if is_management:
-            return self.search([]) 
-        
-        # Para empleados no-management, retornar tableros de su departamento
-        return self.search([('department_id', '=', employee.department_id.id)])
+        access = self._get_user_board_access()
+        if access.is_management:
+            return self.search([])
 
-    # Método para evitar errores al acceder department_id eliminado
-    def check_department_access(self):
-        """Verifica que el departamento aún exista"""
-        for record in self:
-            if record.department_id and not record.department_id.exists():
-                record.department_id = False
-                record.responsible_person_id = False
-
-    # Sobrescribir read para manejar departamentos eliminados
-    def read(self, fields=None, load='_classic_read'):
-        self.check_department_access()
-        return super(Boards, self).read(fields=fields, load=load)
\ No newline at end of file
+        # Para empleados no-management, retornar tableros de su departamento
+        return self.browse(access.department_board_ids)
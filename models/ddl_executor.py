@@ -0,0 +1,174 @@
+from odoo import models, api, SUPERUSER_ID, _
+from odoo.exceptions import UserError
+from psycopg2 import errors
+import logging
+import random
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Clave en cr.postcommit.data con las columnas a eliminar tras el commit
+PENDING_DROPS_KEY = 'task_planner.pending_column_drops'
+
+# Tipo SQL de cada tipo de campo manual, igual al ``column_type`` del ORM: al
+# inicializar el registro la columna creada de antemano ya coincide y no se
+# convierte (ALTER COLUMN TYPE reescribe la tabla)
+COLUMN_TYPES = {
+    'char': 'varchar',
+    'text': 'text',
+    'html': 'text',
+    'integer': 'int4',
+    'float': 'float8',
+    'boolean': 'bool',
+    'date': 'date',
+    'datetime': 'timestamp',
+    'selection': 'varchar',
+}
+
+
+class PlannerDDLExecutor(models.AbstractModel):
+    """Ejecución de DDL de campos dinámicos sin bloquear a los lectores.
+
+    Cada sentencia se ejecuta en su propio savepoint con ``lock_timeout``: si
+    no obtiene el bloqueo a tiempo se revierte sólo el savepoint y se reintenta
+    con espera exponencial, en lugar de quedarse en cola bloqueando a todas las
+    lecturas de la tabla. Los ``ADD COLUMN`` se ejecutan en el cursor de la
+    petición (la petición ya tiene bloqueos sobre la tabla y un segundo cursor
+    se bloquearía con ella); los ``DROP COLUMN`` se aplazan a un cursor propio
+    después del commit.
+    """
+    _name = 'task.planner.ddl'
+    _description = 'Ejecutor de DDL de campos dinámicos'
+
+    @api.model
+    def _get_ddl_settings(self):
+        get_param = self.env['ir.config_parameter'].sudo().get_param
+        return {
+            'lock_timeout': int(get_param('task_planner.ddl_lock_timeout', 3000)),
+            'max_attempts': max(1, int(get_param('task_planner.ddl_max_attempts', 4))),
+            'backoff': float(get_param('task_planner.ddl_backoff', 0.25)),
+        }
+
+    @api.model
+    def _execute_ddl(self, statements, cr=None):
+        """Ejecuta las sentencias con lock_timeout, savepoint y reintentos.
+
+        Devuelve una lista con ``statement``, ``attempts`` y ``duration``
+        (segundos de la sentencia que tuvo éxito, espera incluida).
+        """
+        cr = cr or self.env.cr
+        settings = self._get_ddl_settings()
+        report = []
+        for statement in statements:
+            for attempt in range(1, settings['max_attempts'] + 1):
+                try:
+                    with cr.savepoint(flush=False):
+                        cr.execute("SELECT current_setting('lock_timeout')")
+                        previous_timeout = cr.fetchone()[0]
+                        cr.execute("SELECT set_config('lock_timeout', %s, true)",
+                                   [f"{settings['lock_timeout']}ms"])
+                        start = time.monotonic()
+                        cr.execute(statement)
+                        duration = time.monotonic() - start
+                        cr.execute("SELECT set_config('lock_timeout', %s, true)", [previous_timeout])
+                    report.append({'statement': statement, 'attempts': attempt, 'duration': duration})
+                    break
+                except errors.LockNotAvailable:
+                    _logger.warning("DDL sin bloqueo tras %sms (intento %s/%s): %s",
+                                    settings['lock_timeout'], attempt, settings['max_attempts'], statement)
+                    if attempt == settings['max_attempts']:
+                        raise UserError(_(
+                            "La tabla está ocupada y no se pudo modificar tras %s intentos. "
+                            "Inténtelo de nuevo en unos momentos."
+                        ) % settings['max_attempts'])
+                    delay = settings['backoff'] * (2 ** (attempt - 1))
+                    time.sleep(min(delay, 5.0) * random.uniform(0.5, 1.0))
+        return report
+
+    @api.model
+    def _add_columns(self, table, columns, if_not_exists=True):
+        """Añade varias columnas con un único ALTER TABLE.
+
+        ``columns`` es una lista de ``(nombre, tipo_sql)``. El bloqueo ACCESS
+        EXCLUSIVE se mantiene hasta el commit de la petición; el tiempo total
+        se registra en el log al confirmar.
+        """
+        if not columns:
+            return []
+        clause = 'ADD COLUMN IF NOT EXISTS' if if_not_exists else 'ADD COLUMN'
+        statement = f'ALTER TABLE "{table}" ' + ', '.join(
+            f'{clause} "{name}" {column_type}' for name, column_type in columns
+        )
+        acquired_at = time.monotonic()
+        report = self._execute_ddl([statement])
+        self._log_lock_hold(table, acquired_at, report)
+        return report
+
+    @api.model
+    def _drop_existing_columns(self, table, columns):
+        """Elimina ahora, con un único ALTER TABLE, las columnas que existan.
+
+        Para migraciones: sólo se consideran las columnas de la tabla del
+        esquema actual.
+        """
+        self.env.cr.execute("""
+            SELECT column_name FROM information_schema.columns
+             WHERE table_schema = current_schema() AND table_name = %s AND column_name = ANY(%s)
+        """, [table, list(columns)])
+        existing = [row[0] for row in self.env.cr.fetchall()]
+        if not existing:
+            return []
+        return self._execute_ddl([f'ALTER TABLE "{table}" ' + ', '.join(
+            f'DROP COLUMN IF EXISTS "{column}"' for column in existing
+        )])
+
+    @api.model
+    def _log_lock_hold(self, table, acquired_at, report):
+        attempts = sum(item['attempts'] for item in report)
+        duration = sum(item['duration'] for item in report)
+
+        def log_hold():
+            _logger.info("Bloqueo de %s retenido %.3fs hasta el commit (DDL %.3fs, %s intento(s))",
+                         table, time.monotonic() - acquired_at, duration, attempts)
+        self.env.cr.postcommit.add(log_hold)
+
+    @api.model
+    def _drop_columns_after_commit(self, table, columns):
+        """Programa la eliminación de columnas para después del commit.
+
+        Se agrupan todas las columnas de la transacción en un DROP por tabla
+        que se ejecuta en un cursor propio, cuando la petición ya ha liberado
+        sus bloqueos. Si la petición se revierte no se elimina nada.
+        """
+        if not columns:
+            return
+        pending = self.env.cr.postcommit.data.setdefault(PENDING_DROPS_KEY, {})
+        if not pending:
+            self.env.cr.postcommit.add(self._make_pending_drops_callback())
+        pending.setdefault(table, set()).update(columns)
+
+    def _make_pending_drops_callback(self):
+        registry = self.env.registry
+        pending = self.env.cr.postcommit.data.setdefault(PENDING_DROPS_KEY, {})
+
+        def drop_columns():
+            tables = dict(pending)
+            pending.clear()
+            for table, columns in tables.items():
+                statement = f'ALTER TABLE "{table}" ' + ', '.join(
+                    f'DROP COLUMN IF EXISTS "{name}"' for name in sorted(columns)
+                )
+                try:
+                    with registry.cursor() as cr:
+                        env = api.Environment(cr, SUPERUSER_ID, {})
+                        start = time.monotonic()
+                        report = env['task.planner.ddl']._execute_ddl([statement], cr=cr)
+                        cr.commit()
+                        _logger.info("Columnas %s eliminadas de %s; bloqueo retenido %.3fs (%s intento(s))",
+                                     ', '.join(sorted(columns)), table,
+                                     time.monotonic() - start, report[0]['attempts'])
+                except Exception:
+                    # Las columnas quedan huérfanas; no afectan al registro
+                    _logger.exception("No se pudieron eliminar las columnas %s de %s",
+                                      ', '.join(sorted(columns)), table)
+        return drop_columns
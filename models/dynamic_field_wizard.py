@@ -27,39 +27,14 @@ class DynamicFieldWizard(models.TransientModel):
         required=True
     )
     
-    # Campos para manejar opciones de selección
-    selection_option_count = fields.Integer(
-        string="Número de Opciones",
-        default=1,
-        compute='_compute_selection_option_count',
-        store=True
-    )
+    option_line_ids = fields.One2many('dynamic.field.option.line', 'subtask_wizard_id', string='Opciones de Selección')
+
     board_id = fields.Many2one(
         'subtask.board',
         string="Subtarea Relacionada",
         default=lambda self: self._default_subtask_id()
     )
     
-    selection_option_1 = fields.Char(string="Opción 1")
-    selection_option_2 = fields.Char(string="Opción 2")
-    selection_option_3 = fields.Char(string="Opción 3")
-    selection_option_4 = fields.Char(string="Opción 4")
-    selection_option_5 = fields.Char(string="Opción 5")
-    selection_option_6 = fields.Char(string="Opción 6")
-    selection_option_7 = fields.Char(string="Opción 7")
-    selection_option_8 = fields.Char(string="Opción 8")
-    selection_option_9 = fields.Char(string="Opción 9")
-    selection_option_10 = fields.Char(string="Opción 10")
-    selection_option_11 = fields.Char(string="Opción 11")
-    selection_option_12 = fields.Char(string="Opción 12")
-    selection_option_13 = fields.Char(string="Opción 13")
-    selection_option_14 = fields.Char(string="Opción 14")
-    selection_option_15 = fields.Char(string="Opción 15")
-    selection_option_16 = fields.Char(string="Opción 16")
-    selection_option_17 = fields.Char(string="Opción 17")
-    selection_option_18 = fields.Char(string="Opción 18")
-    selection_option_19 = fields.Char(string="Opción 19")
-    selection_option_20 = fields.Char(string="Opción 20")
     subtask_id = fields.Many2one(
         'subtask.board',
         string="Subtarea Relacionada",
@@ -89,46 +64,9 @@ class DynamicFieldWizard(models.TransientModel):
             return subtask.task_id.id
         return False
 
-    @api.depends('dynamic_field_type')
-    def _compute_selection_option_count(self):
-        """Calcula el número de opciones a mostrar"""
-        for wizard in self:
-            if wizard.dynamic_field_type == 'selection':
-                # Si ya tiene opciones definidas, mantener el count
-                if wizard.selection_option_count < 1:
-                    wizard.selection_option_count = 1
-            else:
-                wizard.selection_option_count = 0
-
-    def action_add_selection_option(self):
-        """Añade una nueva opción al campo de selección"""
-        self.ensure_one()
-        if self.dynamic_field_type != 'selection':
-            raise UserError(_("Solo puede agregar opciones a campos de tipo selección"))
-        
-        if self.selection_option_count < 10:
-            self.selection_option_count += 1
-        else:
-            raise UserError(_("Máximo 10 opciones permitidas"))
-        
-        return {
-            'type': 'ir.actions.act_window',
-            'view_mode': 'form',
-            'res_id': self.id,
-            'res_model': 'dynamic.field.wizard',
-            'target': 'new',
-            'context': self.env.context,
-        }
-     
     def _get_selection_options(self):
         """Obtiene todas las opciones de selección ingresadas"""
-        options = []
-        for i in range(1, 11):
-            option_value = getattr(self, f'selection_option_{i}', False)
-            if option_value:
-                # Usar el mismo valor para clave y etiqueta
-                options.append((option_value, option_value))
-        return options
+        return self.option_line_ids._get_selection()
     
    
     def action_create_dynamic_field(self):
@@ -151,15 +89,11 @@ class DynamicFieldWizard(models.TransientModel):
         else:
             selection_values = False
 
-        # Pasa los valores del wizard al subtask
-        self.subtask_id.write({
-            'dynamic_field_name': self.dynamic_field_name,
-            'dynamic_field_label': self.dynamic_field_label,
-            'dynamic_field_type': self.dynamic_field_type,
-            'field_info': self.field_info,
-        })
-
-        # Llama al método en la subtarea pasando las opciones de selección
+        # Los valores del campo viajan como argumentos, no se escriben en la subtarea
         return self.subtask_id.with_context(
             selection_values=selection_values
-        ).action_create_dynamic_field()
\ No newline at end of file
+        ).action_create_dynamic_field_wizard(
+            self.dynamic_field_name,
+            self.dynamic_field_label,
+            self.dynamic_field_type,
+        )
\ No newline at end of file
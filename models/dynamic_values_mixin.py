@@ -0,0 +1,174 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import json
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Operadores de comparación soportados sobre valores JSONB, con su cast SQL
+JSONB_CASTS = {
+    'integer': 'numeric',
+    'float': 'numeric',
+    'date': 'date',
+    'datetime': 'timestamp',
+}
+
+
+def make_dynamic_value_search(field_name):
+    """Método de búsqueda del campo dinámico ``field_name`` guardado en JSONB.
+
+    Se devuelve una función con nombre propio: el ORM lee ``__name__`` del
+    método de búsqueda antes de llamarlo.
+    """
+    def search_dynamic_value(records, operator, value):
+        return records._search_dynamic_values_field(field_name, operator, value)
+    return search_dynamic_value
+
+
+class PlannerDynamicValuesMixin(models.AbstractModel):
+    """Almacenamiento de campos dinámicos en una columna JSONB indexada.
+
+    Los campos dinámicos creados con ``planner_storage = 'jsonb'`` se exponen
+    como campos tipados normales (compute/inverse/search sobre
+    ``dynamic_values``). Añadir uno sólo inserta metadatos: no hay ALTER TABLE,
+    bloqueo de tabla ni reescritura de filas.
+    """
+    _name = 'task.planner.dynamic.values.mixin'
+    _description = 'Valores de campos dinámicos en JSONB'
+
+    dynamic_values = fields.Json(
+        string='Valores dinámicos',
+        prefetch=False,
+        copy=True,
+        help='Valores de los campos dinámicos guardados en JSONB'
+    )
+
+    def init(self):
+        if self._abstract:
+            return
+        self.env.cr.execute(f"""
+            CREATE INDEX IF NOT EXISTS "{self._table}_dynamic_values_gin"
+                ON "{self._table}" USING gin (dynamic_values)
+        """)
+
+    def _get_jsonb_dynamic_fields(self):
+        return [
+            field for field in self._fields.values()
+            if field.compute == '_compute_dynamic_values_fields'
+        ]
+
+    @api.model
+    def _to_json_value(self, field, value):
+        if value is None or (value is False and field.type != 'boolean'):
+            return None
+        if field.type == 'date':
+            return fields.Date.to_string(value)
+        if field.type == 'datetime':
+            return fields.Datetime.to_string(value)
+        if field.type == 'integer':
+            return int(value)
+        if field.type == 'float':
+            return float(value)
+        if field.type == 'boolean':
+            return bool(value) or None
+        return value
+
+    @api.model
+    def _from_json_value(self, field, value):
+        if value is None:
+            return False
+        if field.type == 'date':
+            return fields.Date.to_date(str(value)[:10])
+        if field.type == 'datetime':
+            return fields.Datetime.to_datetime(str(value).replace('T', ' ')[:19])
+        return value
+
+    @api.depends('dynamic_values')
+    def _compute_dynamic_values_fields(self):
+        dynamic_fields = self._get_jsonb_dynamic_fields()
+        for record in self:
+            values = record.dynamic_values or {}
+            for field in dynamic_fields:
+                record[field.name] = self._from_json_value(field, values.get(field.name))
+
+    def _inverse_dynamic_values_fields(self):
+        dynamic_fields = self._get_jsonb_dynamic_fields()
+        for record in self:
+            values = dict(record.dynamic_values or {})
+            for field in dynamic_fields:
+                json_value = self._to_json_value(field, record[field.name])
+                if json_value is None:
+                    values.pop(field.name, None)
+                else:
+                    values[field.name] = json_value
+            record.dynamic_values = values
+
+    def _search_dynamic_values_field(self, field_name, operator, value):
+        field = self._fields[field_name]
+        self.flush_model(['dynamic_values'])
+        cr = self.env.cr
+        if operator in ('=', '!=') and value not in (False, None):
+            # Contención: usa el índice GIN
+            cr.execute(
+                f'SELECT id FROM "{self._table}" WHERE dynamic_values @> %s::jsonb',
+                [json.dumps({field_name: self._to_json_value(field, value)})]
+            )
+            ids = [row[0] for row in cr.fetchall()]
+            return [('id', 'in' if operator == '=' else 'not in', ids)]
+        if operator in ('=', '!='):
+            cr.execute(f'SELECT id FROM "{self._table}" WHERE dynamic_values ? %s', [field_name])
+            ids = [row[0] for row in cr.fetchall()]
+            return [('id', 'not in' if operator == '=' else 'in', ids)]
+        if operator in ('in', 'not in'):
+            # Se comparan valores jsonb: true/false y 3 = 3.0 coinciden como en JSON
+            json_values = [self._to_json_value(field, val) for val in value]
+            conditions, params = [], []
+            values = [json.dumps(val) for val in json_values if val is not None]
+            if values:
+                conditions.append('dynamic_values->%s = ANY(%s::jsonb[])')
+                params += [field_name, values]
+            if None in json_values:
+                # Los valores vacíos no se guardan: equivale a la clave ausente
+                conditions.append('NOT COALESCE(dynamic_values ? %s, false)')
+                params.append(field_name)
+            if not conditions:
+                return [('id', operator, [])]
+            cr.execute(f'SELECT id FROM "{self._table}" WHERE ' + ' OR '.join(conditions), params)
+            ids = [row[0] for row in cr.fetchall()]
+            return [('id', operator, ids)]
+        if operator in ('like', 'ilike', 'not like', 'not ilike', '=like', '=ilike'):
+            sql_operator = operator.lstrip('=').upper()
+            pattern = value if operator.startswith('=') else f'%{value}%'
+            cr.execute(
+                f'SELECT id FROM "{self._table}" WHERE COALESCE(dynamic_values->>%s, \'\') {sql_operator} %s',
+                [field_name, pattern]
+            )
+            return [('id', 'in', [row[0] for row in cr.fetchall()])]
+        if operator in ('<', '<=', '>', '>='):
+            cast = JSONB_CASTS.get(field.type, 'text')
+            cr.execute(
+                f'SELECT id FROM "{self._table}" WHERE (dynamic_values->>%s)::{cast} {operator} %s',
+                [field_name, self._to_json_value(field, value)]
+            )
+            return [('id', 'in', [row[0] for row in cr.fetchall()])]
+        raise UserError(_("Operador no soportado para el campo %s: %s") % (field_name, operator))
+
+    @api.model
+    def _purge_dynamic_value_key(self, field_name):
+        """Elimina la clave de un campo JSONB retirado de todas las filas"""
+        return self._purge_dynamic_value_keys([field_name])
+
+    @api.model
+    def _purge_dynamic_value_keys(self, field_names):
+        """Elimina las claves de varios campos JSONB retirados con un único UPDATE"""
+        field_names = list(field_names)
+        if not field_names:
+            return 0
+        self.flush_model(['dynamic_values'])
+        self.env.cr.execute(f"""
+            UPDATE "{self._table}"
+               SET dynamic_values = dynamic_values - %s::text[]
+             WHERE dynamic_values ?| %s::text[]
+        """, [field_names, field_names])
+        self.invalidate_model(['dynamic_values'])
+        return self.env.cr.rowcount
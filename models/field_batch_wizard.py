@@ -0,0 +1,71 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+from .field_definition import FIELD_TYPES
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class FieldBatchWizard(models.TransientModel):
+    _name = 'dynamic.field.batch.wizard'
+    _description = 'Asistente para crear varios campos dinámicos a la vez'
+
+    target_model = fields.Selection([
+        ('task.board', 'Grupos'),
+        ('subtask.board', 'Tareas'),
+        ('subtask.activity', 'Actividades'),
+    ], string='Crear en', required=True, default='task.board')
+    board_id = fields.Many2one('boards.planner', string='Tablero')
+    task_id = fields.Many2one('task.board', string='Grupo')
+    storage_mode = fields.Selection([
+        ('column', 'Columna propia'),
+        ('jsonb', 'JSONB (sin ALTER TABLE)'),
+    ], string="Almacenamiento", required=True,
+        default=lambda self: self.env['ir.config_parameter'].sudo().get_param(
+            'task_planner.dynamic_field_storage', 'jsonb'),
+        help="JSONB guarda los valores en dynamic_values sin ALTER TABLE")
+    line_ids = fields.One2many('dynamic.field.batch.wizard.line', 'wizard_id', string='Campos')
+
+    def action_create_fields(self):
+        """Crea todos los campos de la lista en una sola transacción"""
+        self.ensure_one()
+        if not self.line_ids:
+            raise UserError(_("Agregue al menos un campo"))
+        if self.target_model == 'task.board' and not self.board_id:
+            raise UserError(_("Seleccione el tablero de los campos"))
+        if self.target_model == 'subtask.board' and not self.task_id:
+            raise UserError(_("Seleccione el grupo de los campos"))
+
+        specs = [line._get_field_spec() for line in self.line_ids]
+        self.env['task.planner.field.definition']._create_dynamic_fields(
+            self.target_model,
+            specs,
+            board=self.board_id if self.target_model == 'task.board' else None,
+            task=self.task_id if self.target_model == 'subtask.board' else None,
+            storage=self.storage_mode,
+        )
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
+
+
+class FieldBatchWizardLine(models.TransientModel):
+    _name = 'dynamic.field.batch.wizard.line'
+    _description = 'Campo a crear en lote'
+
+    wizard_id = fields.Many2one('dynamic.field.batch.wizard', required=True, ondelete='cascade')
+    name = fields.Char(string='Nombre Técnico', required=True)
+    label = fields.Char(string='Etiqueta Visible')
+    field_type = fields.Selection(FIELD_TYPES, string='Tipo de Campo', required=True, default='char')
+    selection_options = fields.Char(string='Opciones', help='Opciones de selección separadas por comas')
+
+    def _get_field_spec(self):
+        self.ensure_one()
+        options = [option.strip() for option in (self.selection_options or '').split(',') if option.strip()]
+        return {
+            'name': self.name,
+            'label': self.label or self.name,
+            'field_type': self.field_type,
+            'selection': [(option, option) for option in options] if self.field_type == 'selection' else [],
+        }
@@ -0,0 +1,495 @@
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+from .ir_model_fields import PLANNER_MODELS
+from .ddl_executor import COLUMN_TYPES
+from lxml import etree
+import ast
+import json
+import logging
+import re
+
+_logger = logging.getLogger(__name__)
+
+FIELD_TYPES = [
+    ('char', 'Texto'),
+    ('text', 'Texto Largo'),
+    ('html', 'HTML'),
+    ('integer', 'Entero'),
+    ('float', 'Decimal'),
+    ('date', 'Fecha'),
+    ('datetime', 'Fecha/Hora'),
+    ('boolean', 'Booleano'),
+    ('selection', 'Selección'),
+]
+
+# Vistas donde se muestran los campos creados en lote: (vista base, xpath, atributos)
+BATCH_VIEW_TARGETS = {
+    'subtask.board': [
+        ('task_planner.view_subtask_tree', "//field[@name='files']", {'optional': 'show'}),
+        ('task_planner.activity_planner_subtask_form', "//field[@name='files']", {}),
+    ],
+    'subtask.activity': [
+        ('task_planner.activity_planner_subtask_form',
+         "//field[@name='activity_line_ids']/tree/field[@name='person']", {}),
+        ('task_planner.view_subtask_activity_form', "//field[@name='person']", {}),
+        ('task_planner.view_subtask_activity_tree', "//field[@name='person']", {}),
+    ],
+}
+
+
+class PlannerFieldDefinition(models.Model):
+    """Definición de un campo dinámico del planificador.
+
+    Sustituye al JSON ``dynamic_fields_data`` que se guardaba en el registro
+    que lanzaba el asistente: cada campo es una fila indexada por modelo,
+    alcance (tablero o grupo) y nombre.
+    """
+    _name = 'task.planner.field.definition'
+    _description = 'Definición de campo dinámico'
+    _order = 'model, id'
+
+    name = fields.Char(string='Nombre Técnico', required=True, index=True)
+    label = fields.Char(string='Etiqueta')
+    field_type = fields.Selection(FIELD_TYPES, string='Tipo de Campo', required=True, default='char')
+    model = fields.Selection([
+        ('task.board', 'Grupos'),
+        ('subtask.board', 'Tareas'),
+        ('subtask.activity', 'Actividades'),
+    ], string='Modelo', required=True)
+    board_id = fields.Many2one('boards.planner', string='Tablero', ondelete='cascade')
+    task_id = fields.Many2one('task.board', string='Grupo', ondelete='cascade')
+    selection_options = fields.Text(string='Opciones de Selección', help='Lista JSON de pares [valor, etiqueta]')
+    storage = fields.Selection([
+        ('column', 'Columna'),
+        ('jsonb', 'JSONB'),
+    ], string='Almacenamiento', default='column', required=True)
+    field_id = fields.Many2one('ir.model.fields', string='Campo', ondelete='cascade')
+    view_ids = fields.Many2many(
+        'ir.ui.view',
+        'task_planner_field_definition_view_rel',
+        'definition_id',
+        'view_id',
+        string='Vistas',
+        help='Vistas generadas que muestran el campo'
+    )
+    active = fields.Boolean(default=True)
+    retired_date = fields.Datetime(
+        string='Retirado el',
+        readonly=True,
+        help='Fecha en que se ocultó el campo; la tarea programada lo elimina después'
+    )
+
+    _sql_constraints = [
+        ('model_name_uniq', 'unique(model, name)', 'Ya existe un campo dinámico con ese nombre en el modelo.'),
+    ]
+
+    def init(self):
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS task_planner_field_definition_board_index
+                ON task_planner_field_definition (model, board_id, name)
+        """)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS task_planner_field_definition_task_index
+                ON task_planner_field_definition (model, task_id, name)
+        """)
+
+    @api.model
+    def _normalize_selection(self, selection_values):
+        """Convierte las opciones (texto o lista) a JSON"""
+        if not selection_values:
+            return False
+        if isinstance(selection_values, str):
+            try:
+                selection_values = ast.literal_eval(selection_values)
+            except (ValueError, SyntaxError):
+                return False
+        return json.dumps([list(option) for option in selection_values])
+
+    @api.model
+    def _register_definition(self, model_name, name, label, field_type, board=None, task=None,
+                             selection_values=False, storage='column'):
+        """Registra (o actualiza) la definición de un campo dinámico"""
+        field = self.env['ir.model.fields'].sudo().search([
+            ('model', '=', model_name),
+            ('name', '=', name),
+        ], limit=1)
+        vals = {
+            'model': model_name,
+            'name': name,
+            'label': label or name,
+            'field_type': field_type or 'char',
+            'board_id': board.id if board else False,
+            'task_id': task.id if task else False,
+            'selection_options': self._normalize_selection(selection_values),
+            'storage': storage or 'column',
+            'field_id': field.id,
+            'active': True,
+        }
+        definition = self.sudo().with_context(active_test=False).search([
+            ('model', '=', model_name),
+            ('name', '=', name),
+        ], limit=1)
+        if definition:
+            definition.write(vals)
+            return definition
+        return self.sudo().create(vals)
+
+    @api.model
+    def _get_scope_domain(self, model_name, scope_id):
+        domain = [('model', '=', model_name)]
+        if model_name == 'task.board':
+            domain.append(('board_id', '=', scope_id))
+        elif model_name == 'subtask.board':
+            domain.append(('task_id', '=', scope_id))
+        return domain
+
+    @api.model
+    @tools.ormcache('model_name', 'scope_id')
+    def _get_scope_field_names(self, model_name, scope_id):
+        """Nombres de los campos dinámicos de un tablero o grupo concreto.
+
+        El alcance es el tablero (``boards.planner``) para ``task.board`` y el
+        grupo (``task.board``) para ``subtask.board``. Los campos de
+        ``subtask.activity`` son globales al modelo.
+        """
+        if model_name not in PLANNER_MODELS:
+            return ()
+        if model_name == 'subtask.activity':
+            dynamic_fields = self.env['ir.model.fields']._get_planner_dynamic_fields(model_name)
+            return tuple(name for name, _label in dynamic_fields)
+        definitions = self.sudo().search_read(self._get_scope_domain(model_name, scope_id), ['name'], order='id')
+        return tuple(definition['name'] for definition in definitions)
+
+    @api.model
+    def _link_views(self, model_name, field_name, views):
+        """Registra las vistas generadas que muestran el campo"""
+        definition = self.sudo().with_context(active_test=False).search([
+            ('model', '=', model_name),
+            ('name', '=', field_name),
+        ], limit=1)
+        if definition and views:
+            definition.view_ids = [(4, view.id) for view in views]
+
+    @api.model
+    def _get_field_views(self, model_name, field_name):
+        """Vistas que muestran el campo según el índice ``view_ids``.
+
+        Los campos creados antes del índice recurren al nombre de las vistas
+        generadas (``*.dynamic.<campo>*``), limitado a los modelos del
+        planificador.
+        """
+        definition = self.sudo().with_context(active_test=False).search([
+            ('model', '=', model_name),
+            ('name', '=', field_name),
+        ], limit=1)
+        if definition.view_ids:
+            return definition.view_ids
+        candidates = self.env['ir.ui.view'].sudo().search([
+            ('model', 'in', list(PLANNER_MODELS)),
+            ('name', '=like', f'%.dynamic.{field_name}%'),
+        ])
+        return candidates.filtered(
+            lambda view: view.name.endswith(f'.dynamic.{field_name}') or f'.dynamic.{field_name}.' in view.name
+        )
+
+    @api.model
+    def _release_field_views(self, model_name, field_name):
+        """Quita el campo de las vistas que lo muestran antes de eliminarlo"""
+        return self._release_fields_views(model_name, [field_name])
+
+    @api.model
+    def _release_fields_views(self, model_name, field_names):
+        """Quita varios campos de las vistas que los muestran.
+
+        Las vistas por tablero se regeneran una sola vez sin los campos; en
+        las vistas compartidas con otros campos sólo se quitan sus nodos y
+        las vistas generadas sólo para estos campos se eliminan.
+        """
+        field_names = list(field_names)
+        definitions = self.sudo().with_context(active_test=False).search([
+            ('model', '=', model_name),
+            ('name', 'in', field_names),
+        ])
+        views = definitions.view_ids
+        for field_name in set(field_names) - set(definitions.filtered('view_ids').mapped('name')):
+            views |= self._get_field_views(model_name, field_name)
+        if not views:
+            return 0
+        boards = self.env['boards.planner'].sudo().search([('tree_view_id', 'in', views.ids)])
+        if boards:
+            views -= boards.tree_view_id
+            self.env['task.board']._regenerate_board_tree_views(boards, exclude=field_names)
+        # Las vistas de un lote se comparten con otros campos: sólo se quitan los nodos
+        others = self.sudo().with_context(active_test=False).search([
+            ('view_ids', 'in', views.ids),
+            '!', '&', ('model', '=', model_name), ('name', 'in', field_names),
+        ])
+        shared_views = views & others.view_ids
+        for view in shared_views:
+            arch = etree.fromstring(view.arch_db)
+            for field_name in field_names:
+                for node in arch.xpath(f"//field[@name='{field_name}']"):
+                    node.getparent().remove(node)
+            view.write({'arch': etree.tostring(arch, encoding='unicode')})
+        views -= shared_views
+        count = len(views) + len(shared_views)
+        views.unlink()
+        return count
+
+    @api.model
+    def _make_field_name(self, name):
+        """Genera un nombre de campo válido con prefijo x_"""
+        clean_name = re.sub(r'[^a-zA-Z0-9_]', '', (name or '').strip().lower().replace(' ', '_'))
+        if not clean_name.startswith('x_'):
+            clean_name = f'x_{clean_name}'
+        return clean_name
+
+    @api.model
+    def _create_dynamic_fields(self, model_name, specs, board=None, task=None, storage='column'):
+        """Crea varios campos dinámicos en una sola transacción.
+
+        ``specs`` es una lista de diccionarios con ``name``, ``label``,
+        ``field_type`` y, para selecciones, ``selection`` (lista de pares).
+        Se ejecuta un único ALTER TABLE con todas las columnas, un único
+        ``create`` en ``ir.model.fields`` (una reconstrucción del registro),
+        una regeneración de vistas y un refresco del modelo.
+        """
+        if model_name not in PLANNER_MODELS:
+            raise UserError(_("El modelo %s no admite campos dinámicos") % model_name)
+        model = self.env[model_name]
+        if storage == 'jsonb' and not hasattr(model, '_compute_dynamic_values_fields'):
+            storage = 'column'
+        ir_model = self.env['ir.model']._get(model_name)
+
+        names, columns, field_vals_list, definition_vals_list = [], [], [], []
+        for spec in specs:
+            name = self._make_field_name(spec.get('name'))
+            field_type = spec.get('field_type') or 'char'
+            label = spec.get('label') or name.replace('_', ' ').title()
+            selection = spec.get('selection') or []
+            if name == 'x_' or name in model._fields or name in names:
+                raise UserError(_("El campo %s ya existe o no es válido") % name)
+            if field_type not in COLUMN_TYPES:
+                raise UserError(_("Tipo de campo no válido: %s") % field_type)
+            if field_type == 'selection' and not selection:
+                raise UserError(_("Debe agregar al menos una opción para el campo %s") % label)
+            names.append(name)
+            field_vals = {
+                'name': name,
+                'model_id': ir_model.id,
+                'field_description': label,
+                'ttype': field_type,
+                'state': 'manual',
+                'store': storage != 'jsonb',
+                'planner_storage': storage,
+                'required': False,
+            }
+            if field_type == 'selection':
+                field_vals['selection'] = str([tuple(option) for option in selection])
+            field_vals_list.append(field_vals)
+            if storage != 'jsonb':
+                columns.append((name, COLUMN_TYPES[field_type]))
+            definition_vals_list.append({
+                'model': model_name,
+                'name': name,
+                'label': label,
+                'field_type': field_type,
+                'board_id': board.id if board else False,
+                'task_id': task.id if task else False,
+                'selection_options': self._normalize_selection(selection),
+                'storage': storage,
+            })
+        if not names:
+            raise UserError(_("Agregue al menos un campo"))
+
+        self.env['task.planner.ddl']._add_columns(model._table, columns)
+        ir_fields = self.env['ir.model.fields'].sudo().create(field_vals_list)
+        for definition_vals, ir_field in zip(definition_vals_list, ir_fields):
+            definition_vals['field_id'] = ir_field.id
+        definitions = self.sudo().create(definition_vals_list)
+        self._create_batch_views(model_name, definitions, task=task)
+        _logger.info("Creados %d campos dinámicos en %s: %s", len(names), model_name, ', '.join(names))
+        return definitions
+
+    @api.model
+    def _create_batch_views(self, model_name, definitions, task=None):
+        """Genera las vistas de un lote de campos y refresca el modelo una vez"""
+        if model_name == 'task.board':
+            # La vista por tablero ya refresca el modelo al regenerarse
+            return self.env['task.board']._regenerate_board_tree_views(definitions.board_id)
+        View = self.env['ir.ui.view'].sudo()
+        views = View
+        for xmlid, xpath_expr, extra_attrs in BATCH_VIEW_TARGETS[model_name]:
+            base_view = self.env.ref(xmlid, raise_if_not_found=False)
+            if not base_view:
+                continue
+            xpath = etree.Element('xpath', expr=xpath_expr, position='after')
+            for definition in definitions:
+                attrs = dict(extra_attrs, name=definition.name, string=definition.label or definition.name)
+                if model_name == 'subtask.board' and task:
+                    attrs['invisible'] = (
+                        f"context.get('default_task_id') != {task.id} or not context.get('default_task_id')"
+                    )
+                etree.SubElement(xpath, 'field', attrs)
+            data = etree.Element('data')
+            data.append(xpath)
+            views |= View.create({
+                'name': f'{base_view.model}.{base_view.type}.dynamic.batch_{definitions[0].id}',
+                'model': base_view.model,
+                'inherit_id': base_view.id,
+                'type': base_view.type,
+                'priority': 100,
+                'arch': etree.tostring(data, encoding='unicode'),
+            })
+        definitions.write({'view_ids': [(4, view.id) for view in views]})
+        self.env['ir.model.fields']._refresh_planner_model(model_name)
+        return views
+
+    @api.model
+    def _deactivate_dynamic_fields(self, model_name, field_names):
+        """Oculta varios campos dinámicos sin DDL mientras el usuario espera.
+
+        Las definiciones se marcan inactivas (quedan fuera del registro de
+        campos y de las vistas generadas) y sus vistas se regeneran. La
+        columna, el registro de ``ir.model.fields`` y las claves JSONB los
+        elimina después ``_cron_purge_retired_fields`` en la ventana de purga.
+        """
+        if model_name not in PLANNER_MODELS:
+            raise UserError(_("El modelo %s no admite campos dinámicos") % model_name)
+        names = sorted({name for name in field_names if name and name.startswith('x_')})
+        if not names:
+            return 0
+        definitions = self.sudo().with_context(active_test=False).search([
+            ('model', '=', model_name),
+            ('name', 'in', names),
+        ])
+        # Campos sin definición: se registran para que la purga los encuentre
+        missing = set(names) - set(definitions.mapped('name'))
+        if missing:
+            type_codes = dict(FIELD_TYPES)
+            for field in self.env['ir.model.fields'].sudo().search([
+                ('model', '=', model_name),
+                ('name', 'in', list(missing)),
+            ]):
+                definitions |= self._register_definition(
+                    model_name, field.name, field.field_description,
+                    field.ttype if field.ttype in type_codes else 'char',
+                    storage=field.planner_storage or 'column',
+                )
+
+        self._release_fields_views(model_name, names)
+        definitions.write({
+            'active': False,
+            'retired_date': fields.Datetime.now(),
+            'view_ids': [(5, 0, 0)],
+        })
+        self.env['ir.model.fields']._refresh_planner_model(model_name)
+        _logger.info("Ocultados %d campos dinámicos de %s a la espera de purga: %s",
+                     len(names), model_name, ', '.join(names))
+        return len(names)
+
+    @api.model
+    def _in_purge_window(self):
+        """Indica si la hora actual (UTC) está en la ventana de purga ``inicio-fin``"""
+        window = self.env['ir.config_parameter'].sudo().get_param('task_planner.purge_window', '22-6')
+        try:
+            start, end = (int(hour) for hour in window.split('-'))
+        except ValueError:
+            _logger.warning("Ventana de purga no válida: %s", window)
+            return True
+        hour = fields.Datetime.now().hour
+        if start <= end:
+            return start <= hour < end
+        return hour >= start or hour < end
+
+    @api.model
+    def _cron_purge_retired_fields(self):
+        """Elimina físicamente los campos retirados por lotes, fuera de horario.
+
+        Cada modelo se purga con ``_retire_dynamic_fields`` (un DROP por
+        tabla) y se confirma por separado para liberar los bloqueos cuanto
+        antes.
+        """
+        if not self._in_purge_window():
+            return
+        batch_size = int(self.env['ir.config_parameter'].sudo().get_param('task_planner.purge_batch_size', 50))
+        retired = self.sudo().with_context(active_test=False).search([
+            ('active', '=', False),
+            ('retired_date', '!=', False),
+        ], order='retired_date, id', limit=batch_size)
+        for model_name in sorted(set(retired.mapped('model'))):
+            names = retired.filtered(lambda definition: definition.model == model_name).mapped('name')
+            try:
+                self._retire_dynamic_fields(model_name, names)
+                self.env.cr.commit()
+            except Exception:
+                self.env.cr.rollback()
+                _logger.exception("No se pudieron purgar los campos %s de %s", ', '.join(names), model_name)
+
+    @api.model
+    def _retire_dynamic_fields(self, model_name, field_names):
+        """Retira varios campos dinámicos de un modelo en una sola pasada.
+
+        Se limpian las vistas una vez, se elimina en un único ``unlink`` de
+        ``ir.model.fields`` (una reconstrucción del registro) y todas las
+        columnas se eliminan con un solo ``ALTER TABLE ... DROP COLUMN`` por
+        tabla después del commit. Las claves JSONB se purgan con un único
+        UPDATE y el modelo se refresca una vez.
+        """
+        if model_name not in PLANNER_MODELS:
+            raise UserError(_("El modelo %s no admite campos dinámicos") % model_name)
+        names = sorted({name for name in field_names if name and name.startswith('x_')})
+        if not names:
+            return 0
+        table = self.env[model_name]._table
+
+        self._release_fields_views(model_name, names)
+        self._remove_definitions(model_name, names)
+
+        # Columnas sin registro en ir.model.fields (creaciones interrumpidas)
+        self.env.cr.execute("""
+            SELECT column_name FROM information_schema.columns
+             WHERE table_name = %s AND column_name = ANY(%s)
+        """, [table, names])
+        self.env['task.planner.ddl']._drop_columns_after_commit(table, [row[0] for row in self.env.cr.fetchall()])
+
+        # El DROP de las columnas almacenadas lo agrupa _drop_column
+        ir_fields = self.env['ir.model.fields'].sudo().search([
+            ('model', '=', model_name),
+            ('name', 'in', names),
+            ('state', '=', 'manual'),
+        ])
+        ir_fields.unlink()
+
+        model = self.env[model_name]
+        if hasattr(model, '_purge_dynamic_value_keys'):
+            model._purge_dynamic_value_keys(names)
+        self.env['ir.model.fields']._refresh_planner_model(model_name)
+        _logger.info("Retirados %d campos dinámicos de %s: %s", len(names), model_name, ', '.join(names))
+        return len(names)
+
+    @api.model
+    def _remove_definitions(self, model_name, names):
+        """Elimina las definiciones de los campos indicados"""
+        definitions = self.sudo().with_context(active_test=False).search([
+            ('model', '=', model_name),
+            ('name', 'in', list(names)),
+        ])
+        definitions.unlink()
+        return len(definitions)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        self.env.registry.clear_cache()
+        return result
+
+    def unlink(self):
+        result = super().unlink()
+        self.env.registry.clear_cache()
+        return result
@@ -0,0 +1,25 @@
+from odoo import models, fields
+
+
+class DynamicFieldOptionLine(models.TransientModel):
+    _name = 'dynamic.field.option.line'
+    _description = 'Opción de un campo de selección dinámico'
+    _order = 'sequence, id'
+
+    sequence = fields.Integer(default=10)
+    value = fields.Char(string='Valor', required=True)
+    label = fields.Char(string='Etiqueta', help='Si se deja vacía se usa el valor')
+
+    # Asistente al que pertenece la opción
+    add_wizard_id = fields.Many2one('add.field.subtask.wizard', ondelete='cascade')
+    groups_wizard_id = fields.Many2one('field.tree.groups.wizard', ondelete='cascade')
+    subtask_wizard_id = fields.Many2one('dynamic.field.wizard', ondelete='cascade')
+
+    def _get_selection(self):
+        """Pares (clave, etiqueta) para ``ir.model.fields.selection``"""
+        options = []
+        for line in self:
+            value = (line.value or '').strip()
+            if value and value not in dict(options):
+                options.append((value, (line.label or '').strip() or value))
+        return options
@@ -0,0 +1,57 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class FieldRetireWizard(models.TransientModel):
+    _name = 'dynamic.field.retire.wizard'
+    _description = 'Asistente para retirar varios campos dinámicos a la vez'
+
+    target_model = fields.Selection([
+        ('task.board', 'Grupos'),
+        ('subtask.board', 'Tareas'),
+        ('subtask.activity', 'Actividades'),
+    ], string='Retirar de', required=True, default='task.board')
+    board_id = fields.Many2one('boards.planner', string='Tablero')
+    task_id = fields.Many2one('task.board', string='Grupo')
+    definition_ids = fields.Many2many(
+        'task.planner.field.definition',
+        'dynamic_field_retire_wizard_definition_rel',
+        'wizard_id',
+        'definition_id',
+        string='Campos a retirar',
+        domain="[('model', '=', target_model), '|', ('board_id', '=', False), ('board_id', '=', board_id),"
+               " '|', ('task_id', '=', False), ('task_id', '=', task_id)]"
+    )
+    purge_now = fields.Boolean(
+        string='Eliminar ahora',
+        help='Elimina las columnas al momento en lugar de esperar a la purga fuera de horario'
+    )
+
+    @api.onchange('target_model', 'board_id', 'task_id')
+    def _onchange_scope(self):
+        self.definition_ids = self.definition_ids.filtered(lambda definition: definition.model == self.target_model)
+
+    def action_retire_fields(self):
+        """Oculta los campos seleccionados; con ``purge_now`` los elimina con un DROP por tabla"""
+        self.ensure_one()
+        if not self.definition_ids:
+            raise UserError(_("Seleccione al menos un campo para retirar"))
+        names = self.definition_ids.filtered(lambda definition: definition.model == self.target_model).mapped('name')
+        try:
+            Definition = self.env['task.planner.field.definition']
+            if self.purge_now:
+                Definition._retire_dynamic_fields(self.target_model, names)
+            else:
+                Definition._deactivate_dynamic_fields(self.target_model, names)
+        except UserError:
+            raise
+        except Exception as e:
+            _logger.error("❌ Error retirando campos %s: %s", ', '.join(names), str(e))
+            raise UserError(_("Error al retirar los campos: %s") % str(e))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
@@ -24,28 +24,20 @@ class FieldTreeGroupsWizard(models.TransientModel):
         ('boolean', 'Booleano'),
         ('selection', 'Selección'),
     ], string="Tipo de Campo", required=True)
+    storage_mode = fields.Selection([
+        ('column', 'Columna propia'),
+        ('jsonb', 'JSONB (sin ALTER TABLE)'),
+    ], string="Almacenamiento", required=True,
+        default=lambda self: self.env['ir.config_parameter'].sudo().get_param(
+            'task_planner.dynamic_field_storage', 'jsonb'),
+        help="JSONB guarda el valor en la columna indexada dynamic_values: "
+             "crear el campo no bloquea ni reescribe la tabla de grupos")
 
     # Relación al tablero (boards.planner) y al grupo (task.board)
     board_id = fields.Many2one('boards.planner', string='Tablero', required=False)
     task_id = fields.Many2one('task.board', string='Grupo')
 
-    # Contador / control para las opciones de selección (aseguramos que exista)
-    selection_option_count = fields.Integer(
-        string="Número de Opciones",
-        default=1
-    )
-
-    # Hasta 10 opciones de selección
-    selection_option_1 = fields.Char(string="Opción 1")
-    selection_option_2 = fields.Char(string="Opción 2")
-    selection_option_3 = fields.Char(string="Opción 3")
-    selection_option_4 = fields.Char(string="Opción 4")
-    selection_option_5 = fields.Char(string="Opción 5")
-    selection_option_6 = fields.Char(string="Opción 6")
-    selection_option_7 = fields.Char(string="Opción 7")
-    selection_option_8 = fields.Char(string="Opción 8")
-    selection_option_9 = fields.Char(string="Opción 9")
-    selection_option_10 = fields.Char(string="Opción 10")
+    option_line_ids = fields.One2many('dynamic.field.option.line', 'groups_wizard_id', string='Opciones de Selección')
 
     @api.model
     def default_get(self, fields_list):
@@ -61,34 +53,9 @@ class FieldTreeGroupsWizard(models.TransientModel):
         """Obtiene el tablero del contexto"""
         return self.env.context.get('board_id')
 
-    def action_add_selection_option(self):
-        """Aumentar el número de opciones (máx 10)."""
-        self.ensure_one()
-        if self.dynamic_field_type != 'selection':
-            raise UserError(_("Solo puede agregar opciones si el tipo es 'Selección'"))
-        if self.selection_option_count < 10:
-            self.selection_option_count += 1
-        else:
-            raise UserError(_("Máximo 10 opciones permitidas"))
-        # Recargar el wizard para que se muestren los campos nuevos en la vista
-        return {
-            'type': 'ir.actions.act_window',
-            'res_model': self._name,
-            'res_id': self.id,
-            'view_mode': 'form',
-            'target': 'new',
-            'context': self.env.context,
-        }
-
     def _get_selection_options(self):
         """Recoger las opciones de selección definidas en el wizard."""
-        options = []
-        for i in range(1, 11):
-            val = getattr(self, f'selection_option_{i}', False)
-            if val:
-                # Odoo acepta una lista de tuplas para selection: [(key,label),...]
-                options.append((val, val))
-        return options
+        return self.option_line_ids._get_selection()
 
     def _get_task_board_auto(self):
         """Detecta automáticamente el grupo (task.board) al que se debe asociar el campo."""
@@ -144,6 +111,7 @@ class FieldTreeGroupsWizard(models.TransientModel):
         try:
             context = {
                 'selection_values': selection_values,
+                'dynamic_field_storage': self.storage_mode,
                 'default_department_id': task_board.department_id.id,
                 'creating_for_specific_board': True,
                 'active_department_id': task_board.department_id.id  # Contexto adicional
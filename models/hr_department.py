@@ -0,0 +1,28 @@
+from odoo import models, api
+
+
+class HrDepartment(models.Model):
+    _inherit = 'hr.department'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Un departamento nuevo puede ser "Management": invalida el acceso en caché
+        self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        if {'name', 'manager_id', 'member_ids'} & set(vals):
+            self.env.registry.clear_cache()
+        return result
+
+    def unlink(self):
+        # Desvincula los tableros en una sola escritura; responsible_person_id
+        # se recalcula por sus dependencias
+        boards = self.env['boards.planner'].sudo().search([('department_id', 'in', self.ids)])
+        if boards:
+            boards.write({'department_id': False})
+        result = super().unlink()
+        self.env.registry.clear_cache()
+        return result
@@ -0,0 +1,57 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+
+class HrEmployee(models.Model):
+    _inherit = 'hr.employee'
+
+    planner_board_ids = fields.Many2many(
+        'boards.planner',
+        string='Tableros permitidos',
+        compute='_compute_planner_board_ids',
+        search='_search_planner_board_ids',
+        help='Tableros en los que el empleado puede ser responsable'
+    )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if any(vals.get('user_id') for vals in vals_list):
+            self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        # Cambia member_ids del departamento o el usuario vinculado: invalida
+        # el acceso a tableros en caché (boards.planner._get_user_board_access)
+        if {'department_id', 'user_id'} & set(vals):
+            self.env.registry.clear_cache()
+        return result
+
+    def _compute_planner_board_ids(self):
+        Boards = self.env['boards.planner']
+        open_boards = Boards.search([('pick_from_dept', '=', False)])
+        for employee in self:
+            employee.planner_board_ids = open_boards | Boards.search([('member_ids', 'in', employee.ids)])
+
+    def _search_planner_board_ids(self, operator, value):
+        """Restringe empleados por tablero sin enviar la lista al cliente.
+
+        ``[('planner_board_ids', '=', board_id)]`` se resuelve en el servidor con
+        la caché de miembros por tablero; un tablero sin restricción (o ningún
+        tablero) no filtra.
+        """
+        if operator not in ('=', 'in'):
+            raise UserError(_("Operador no soportado para planner_board_ids: %s") % operator)
+        board_ids = value if isinstance(value, (list, tuple)) else [value]
+        board_ids = [board_id for board_id in board_ids if board_id]
+        if not board_ids:
+            return []
+        Boards = self.env['boards.planner']
+        employee_ids = set()
+        for board_id in board_ids:
+            member_ids = Boards._get_allowed_member_ids(board_id)
+            if member_ids is None:
+                return []
+            employee_ids.update(member_ids)
+        return [('id', 'in', list(employee_ids))]
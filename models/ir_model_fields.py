@@ -0,0 +1,148 @@
+from odoo import models, fields, api, tools, _
+from odoo.exceptions import UserError
+from .dynamic_values_mixin import make_dynamic_value_search
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# Modelos del planificador que admiten campos dinámicos (x_, state='manual')
+PLANNER_MODELS = ('task.board', 'subtask.board', 'subtask.activity')
+
+
+class IrModelFields(models.Model):
+    _inherit = 'ir.model.fields'
+
+    planner_storage = fields.Selection([
+        ('column', 'Columna'),
+        ('jsonb', 'JSONB'),
+    ], string='Almacenamiento del planificador', default='column',
+        help='Los campos JSONB guardan su valor en dynamic_values en lugar de una columna propia')
+    planner_retired = fields.Boolean(
+        string='Retirado del planificador',
+        compute='_compute_planner_retired',
+        search='_search_planner_retired',
+        help='El campo está oculto y pendiente de purga'
+    )
+
+    def _get_planner_retired_keys(self):
+        if 'task.planner.field.definition' not in self.env:
+            return set()
+        retired = self.env['task.planner.field.definition'].sudo().with_context(active_test=False).search_read(
+            [('active', '=', False)], ['model', 'name'])
+        return {(definition['model'], definition['name']) for definition in retired}
+
+    def _compute_planner_retired(self):
+        retired = self._get_planner_retired_keys()
+        for field in self:
+            field.planner_retired = (field.model, field.name) in retired
+
+    def _search_planner_retired(self, operator, value):
+        if operator not in ('=', '!='):
+            raise UserError(_("Operador no soportado para planner_retired: %s") % operator)
+        retired = self._get_planner_retired_keys()
+        candidates = self.sudo().search([
+            ('model', 'in', list(PLANNER_MODELS)),
+            ('name', 'in', [name for _model, name in retired]),
+        ])
+        retired_ids = candidates.filtered(lambda field: (field.model, field.name) in retired).ids
+        positive = (operator == '=') == bool(value)
+        return [('id', 'in' if positive else 'not in', retired_ids)]
+
+    def _instanciate_attrs(self, field_data):
+        attrs = super()._instanciate_attrs(field_data)
+        if attrs and field_data.get('planner_storage') == 'jsonb':
+            model_class = self.pool.get(field_data['model'])
+            if model_class is not None and hasattr(model_class, '_compute_dynamic_values_fields'):
+                attrs.update(
+                    store=False,
+                    readonly=False,
+                    compute='_compute_dynamic_values_fields',
+                    inverse='_inverse_dynamic_values_fields',
+                    search=make_dynamic_value_search(field_data['name']),
+                )
+        return attrs
+
+    # --------------------------------------------
+    # DYNAMIC FIELD REGISTRY
+    # --------------------------------------------
+    @api.model
+    @tools.ormcache('model_name', 'self.env.lang')
+    def _get_planner_dynamic_fields(self, model_name):
+        """Campos dinámicos del modelo como tupla de (nombre, etiqueta).
+
+        Resultado en caché; se invalida sólo cuando se crea o elimina un
+        campo dinámico de los modelos del planificador. Los campos retirados
+        (pendientes de purga) no se incluyen.
+        """
+        records = self.sudo().search_read([
+            ('model', '=', model_name),
+            ('state', '=', 'manual'),
+            ('name', '=like', 'x\\_%'),
+        ], ['name', 'field_description'], order='id')
+        retired = self._get_planner_retired_keys()
+        return tuple(
+            (rec['name'], rec['field_description']) for rec in records
+            if (model_name, rec['name']) not in retired
+        )
+
+    @api.model
+    def _refresh_planner_model(self, model_name):
+        """Refresca sólo el modelo afectado tras cambiar sus campos dinámicos.
+
+        La creación o eliminación en ``ir.model.fields`` ya reconstruye el
+        registro una vez (incluidos los disparadores de campos); aquí basta con
+        vaciar la caché del modelo y las cachés de vistas, sin volver a llamar
+        a ``setup_models``/``init_models``.
+        """
+        model = self.env[model_name]
+        model.flush_model()
+        model.invalidate_model()
+        self.env.registry.clear_cache()
+
+    @api.model
+    def _invalidate_planner_fields(self):
+        self.env.registry.clear_cache()
+
+    def _is_planner_dynamic(self):
+        return any(
+            field.model in PLANNER_MODELS and field.state == 'manual' and field.name.startswith('x_')
+            for field in self
+        )
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        if records._is_planner_dynamic():
+            self._invalidate_planner_fields()
+        return records
+
+    def write(self, vals):
+        planner_fields = self._is_planner_dynamic()
+        result = super().write(vals)
+        if planner_fields and {'name', 'field_description', 'state', 'model', 'model_id'} & set(vals):
+            self._invalidate_planner_fields()
+        return result
+
+    def _drop_column(self):
+        # Las columnas dinámicas del planificador se eliminan tras el commit,
+        # fuera de la petición, con lock_timeout y reintentos
+        planner_fields = self.filtered(
+            lambda field: field.model in PLANNER_MODELS and field.state == 'manual'
+            and field.name.startswith('x_') and field.store
+        )
+        for model_name in set(planner_fields.mapped('model')):
+            model = self.env.get(model_name)
+            if model is None:
+                continue
+            self.env['task.planner.ddl']._drop_columns_after_commit(
+                model._table,
+                planner_fields.filtered(lambda field: field.model == model_name).mapped('name')
+            )
+        return super(IrModelFields, self - planner_fields)._drop_column()
+
+    def unlink(self):
+        planner_fields = self._is_planner_dynamic()
+        result = super().unlink()
+        if planner_fields:
+            self._invalidate_planner_fields()
+        return result
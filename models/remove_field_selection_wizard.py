@@ -0,0 +1,55 @@
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class RemoveFieldSelectionWizard(models.TransientModel):
+    _name = 'task.board.remove.field.wizard'
+    _description = 'Asistente para elegir el campo dinámico del grupo a eliminar'
+
+    task_id = fields.Many2one('task.board', string='Grupo', required=True, ondelete='cascade')
+    dynamic_field_to_remove = fields.Selection(
+        selection='_get_dynamic_field_options',
+        string='Campo a eliminar',
+        required=True,
+        default=lambda self: self._default_dynamic_field_to_remove(),
+        help='Seleccione el campo dinámico que desea eliminar'
+    )
+
+    @api.model
+    def _get_context_task(self):
+        return self.env['task.board'].browse(self.env.context.get('default_task_id'))
+
+    @api.model
+    def _get_dynamic_field_options(self):
+        """Campos dinámicos del tablero del grupo indicado en el contexto"""
+        task = self._get_context_task()
+        if task:
+            return task._get_dynamic_field_options()
+        return list(self.env['ir.model.fields']._get_planner_dynamic_fields('task.board'))
+
+    @api.model
+    def _default_dynamic_field_to_remove(self):
+        options = self._get_dynamic_field_options()
+        return options[0][0] if options else False
+
+    def remove_selected_field(self):
+        self.ensure_one()
+        if not self.dynamic_field_to_remove:
+            raise UserError(_("Por favor seleccione un campo para eliminar"))
+
+        field_name = self.dynamic_field_to_remove
+
+        try:
+            self.env['task.planner.field.definition']._deactivate_dynamic_fields('task.board', [field_name])
+
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'reload',
+                'params': {'wait': True}
+            }
+        except Exception as e:
+            _logger.error("Error removing field %s: %s", field_name, str(e))
+            raise UserError(_("Error eliminando campo: %s") % str(e))
@@ -0,0 +1,109 @@
+from odoo import models, api
+import logging
+
+_logger = logging.getLogger(__name__)
+
+
+class PlannerSequenceMixin(models.AbstractModel):
+    """Numeración de registros respaldada por secuencias de PostgreSQL.
+
+    Los modelos que heredan definen ``_sequence_field`` (campo entero a
+    numerar) y opcionalmente ``_sequence_scope_field`` (many2one padre). Con el
+    parámetro ``task_planner.scoped_sequences`` activo cada padre tiene su
+    propia secuencia; si no, se usa una secuencia global por modelo. El
+    modelo padre llama a ``_drop_scoped_sequences`` al borrar sus registros.
+    Las secuencias no garantizan números sin huecos: una transacción
+    revertida consume los números que había reservado.
+    """
+    _name = 'task.planner.sequence.mixin'
+    _description = 'Numeración con secuencias de PostgreSQL'
+
+    _sequence_field = None
+    _sequence_scope_field = None
+
+    def init(self):
+        if self._abstract or not self._sequence_field:
+            return
+        self._ensure_sequences([False])
+
+    def _sequence_name(self, scope_id=False):
+        if scope_id:
+            return f'{self._table}_{self._sequence_field}_{int(scope_id)}_seq'
+        return f'{self._table}_{self._sequence_field}_seq'
+
+    @api.model
+    def _use_scoped_sequences(self):
+        if not self._sequence_scope_field:
+            return False
+        param = self.env['ir.config_parameter'].sudo().get_param('task_planner.scoped_sequences')
+        return param not in (False, '', '0', 'False', 'false')
+
+    def _ensure_sequences(self, scope_ids):
+        """Crea las secuencias que falten, inicializadas al máximo actual"""
+        cr = self.env.cr
+        names = {scope_id: self._sequence_name(scope_id) for scope_id in scope_ids}
+        cr.execute(
+            "SELECT relname FROM pg_class WHERE relkind = 'S' AND relname IN %s",
+            [tuple(names.values())]
+        )
+        existing = {row[0] for row in cr.fetchall()}
+        for scope_id, seq_name in names.items():
+            if seq_name in existing:
+                continue
+            # Evita que dos transacciones creen la misma secuencia a la vez
+            cr.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [seq_name])
+            cr.execute("SELECT 1 FROM pg_class WHERE relkind = 'S' AND relname = %s", [seq_name])
+            if cr.fetchone():
+                continue
+            cr.execute(f'CREATE SEQUENCE "{seq_name}"')
+            where, params = '', []
+            if scope_id:
+                where, params = f'WHERE "{self._sequence_scope_field}" = %s', [scope_id]
+            cr.execute(f"""
+                SELECT setval(%s, GREATEST(m.max_value, 1), m.max_value > 0)
+                  FROM (SELECT COALESCE(MAX("{self._sequence_field}"), 0) AS max_value
+                          FROM "{self._table}" {where}) m
+            """, [seq_name] + params)
+            _logger.info("Secuencia %s creada", seq_name)
+
+    def _drop_scoped_sequences(self, scope_ids):
+        """Elimina las secuencias de los padres borrados.
+
+        Se consultan las secuencias existentes aunque el parámetro esté
+        desactivado: pueden quedar de cuando estaba activo.
+        """
+        if not self._sequence_scope_field:
+            return
+        names = [self._sequence_name(scope_id) for scope_id in scope_ids if scope_id]
+        if not names:
+            return
+        cr = self.env.cr
+        cr.execute("SELECT relname FROM pg_class WHERE relkind = 'S' AND relname = ANY(%s)", [names])
+        existing = [row[0] for row in cr.fetchall()]
+        if existing:
+            cr.execute('DROP SEQUENCE IF EXISTS ' + ', '.join(f'"{name}"' for name in existing))
+            _logger.info("Secuencias eliminadas: %s", ', '.join(existing))
+
+    def _next_sequence_values(self, scope_ids):
+        """Devuelve un número por cada elemento de ``scope_ids`` en un solo viaje"""
+        names = [self._sequence_name(scope_id) for scope_id in scope_ids]
+        self.env.cr.execute("""
+            SELECT nextval(s.name::regclass)
+              FROM unnest(%s::text[]) WITH ORDINALITY AS s(name, idx)
+          ORDER BY s.idx
+        """, [names])
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        if self._sequence_field:
+            pending = [vals for vals in vals_list if not vals.get(self._sequence_field)]
+            if pending:
+                scope_ids = [False] * len(pending)
+                if self._use_scoped_sequences():
+                    default_scope = self.env.context.get(f'default_{self._sequence_scope_field}')
+                    scope_ids = [vals.get(self._sequence_scope_field, default_scope) or False for vals in pending]
+                    self._ensure_sequences(set(scope_ids))
+                for vals, number in zip(pending, self._next_sequence_values(scope_ids)):
+                    vals[self._sequence_field] = number
+        return super().create(vals_list)
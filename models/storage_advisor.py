@@ -0,0 +1,271 @@
+from odoo import models, fields, api, SUPERUSER_ID, _
+from odoo.exceptions import UserError
+from .ir_model_fields import PLANNER_MODELS
+import logging
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Sufijo de la tabla de cambios de la migración a JSONB
+OVERFLOW_LOG_SUFFIX = '__overflow_log'
+SKIP_CHANGE_LOG = "SET LOCAL task_planner.skip_change_log = 'on'"
+
+
+class PlannerStorageAdvisor(models.AbstractModel):
+    """Detección y migración de columnas dinámicas dispersas.
+
+    Una columna ``x_`` rellena en pocas filas ocupa un hueco de la tabla y
+    ensancha el mapa de nulos de todas las filas. Las columnas con un grado de
+    relleno por debajo de ``task_planner.sparse_fill_threshold`` se proponen
+    para pasar a ``dynamic_values`` (JSONB): el campo del ORM se conserva con
+    el mismo nombre y tipo, así que las vistas siguen funcionando.
+
+    Desde ``odoo shell``::
+
+        env['task.planner.storage.advisor']._get_column_stats('task.board')
+        env['task.planner.storage.advisor']._migrate_to_overflow('task.board', ['x_campo'])
+    """
+    _name = 'task.planner.storage.advisor'
+    _description = 'Asesor de almacenamiento de campos dinámicos'
+
+    @api.model
+    def _get_sparse_threshold(self):
+        return float(self.env['ir.config_parameter'].sudo().get_param('task_planner.sparse_fill_threshold', 0.05))
+
+    @api.model
+    def _get_column_fields(self, model_name):
+        """Campos dinámicos del modelo que todavía tienen columna propia"""
+        return self.env['ir.model.fields'].sudo().search([
+            ('model', '=', model_name),
+            ('state', '=', 'manual'),
+            ('name', '=like', 'x\\_%'),
+            ('store', '=', True),
+            ('planner_storage', '!=', 'jsonb'),
+            ('planner_retired', '=', False),
+        ], order='id')
+
+    @api.model
+    def _get_column_stats(self, model_name):
+        """Grado de relleno y ancho medio de cada columna dinámica.
+
+        Se usan las estadísticas de PostgreSQL (``pg_stats``) tras un
+        ``ANALYZE`` de las columnas, que sólo lee una muestra de la tabla y no
+        bloquea lecturas ni escrituras.
+        """
+        model = self.env[model_name]
+        column_fields = self._get_column_fields(model_name)
+        if not column_fields:
+            return []
+        names = column_fields.mapped('name')
+        cr = self.env.cr
+        cr.execute(f'ANALYZE "{model._table}" (' + ', '.join(f'"{name}"' for name in names) + ')')
+        cr.execute("SELECT reltuples FROM pg_class WHERE oid = %s::regclass", [model._table])
+        rows = max(int(cr.fetchone()[0]), 0)
+        cr.execute("""
+            SELECT attname, null_frac, avg_width FROM pg_stats
+             WHERE tablename = %s AND attname = ANY(%s) AND schemaname = current_schema()
+        """, [model._table, names])
+        stats = {name: (null_frac, avg_width) for name, null_frac, avg_width in cr.fetchall()}
+        threshold = self._get_sparse_threshold()
+        result = []
+        for field in column_fields:
+            null_frac, avg_width = stats.get(field.name, (1.0, 0))
+            fill_rate = 1.0 - null_frac
+            result.append({
+                'model': model_name,
+                'name': field.name,
+                'label': field.field_description,
+                'rows': rows,
+                'fill_rate': fill_rate,
+                'avg_width': avg_width,
+                'sparse': fill_rate < threshold,
+            })
+        return result
+
+    @api.model
+    def _json_expression(self, field):
+        """Expresión SQL con el valor JSON de la columna, igual que ``_to_json_value``"""
+        if field.ttype == 'boolean':
+            return f'to_jsonb(NULLIF("{field.name}", false))'
+        if field.ttype == 'date':
+            return f'to_jsonb(to_char("{field.name}", \'YYYY-MM-DD\'))'
+        if field.ttype == 'datetime':
+            return f'to_jsonb(to_char("{field.name}", \'YYYY-MM-DD HH24:MI:SS\'))'
+        return f'to_jsonb("{field.name}")'
+
+    @api.model
+    def _migrate_to_overflow(self, model_name, field_names, chunk_size=None):
+        """Pasa columnas dispersas a ``dynamic_values`` por bloques.
+
+        1. Un disparador registra los ids de las filas modificadas a partir
+           de ese momento (tabla de cambios de
+           ``task.planner.table.maintenance``); las copias de este método no
+           se registran.
+        2. Copia los valores no nulos a JSONB por bloques de ids, cada bloque
+           en su propia transacción, y después las filas registradas sin
+           bloquear la tabla.
+        3. En una transacción corta, con las escrituras bloqueadas mediante
+           el ejecutor de DDL, copia sólo las filas registradas desde el paso
+           anterior, pasa los campos a ``planner_storage = 'jsonb'`` (un solo
+           ``write``, una reconstrucción del registro) y programa el DROP de
+           las columnas para después del commit. El disparador se elimina
+           después, también si algo falla.
+        """
+        if model_name not in PLANNER_MODELS:
+            raise UserError(_("El modelo %s no admite campos dinámicos") % model_name)
+        model = self.env[model_name]
+        if not hasattr(model, '_compute_dynamic_values_fields'):
+            raise UserError(_("El modelo %s no tiene almacenamiento JSONB") % model_name)
+        column_fields = self._get_column_fields(model_name).filtered(lambda field: field.name in field_names)
+        if not column_fields:
+            return 0
+        chunk_size = chunk_size or int(self.env['ir.config_parameter'].sudo().get_param(
+            'task_planner.overflow_chunk_size', 2000))
+        table = model._table
+        log_table = table + OVERFLOW_LOG_SUFFIX
+        names = column_fields.mapped('name')
+        payload = 'jsonb_strip_nulls(jsonb_build_object(' + ', '.join(
+            f"'{field.name}', {self._json_expression(field)}" for field in column_fields
+        ) + '))'
+        not_null = ' OR '.join(f'"{field.name}" IS NOT NULL' for field in column_fields)
+        start = time.monotonic()
+        registry = self.env.registry
+
+        self.env.flush_all()
+        try:
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['task.planner.table.maintenance']._create_change_log(table, log_table)
+                cr.commit()
+
+            migrated, last_id = 0, 0
+            while True:
+                with registry.cursor() as cr:
+                    cr.execute(SKIP_CHANGE_LOG)
+                    cr.execute(f"""
+                        UPDATE "{table}" t
+                           SET dynamic_values = COALESCE(t.dynamic_values, '{{}}'::jsonb) || {payload}
+                         WHERE t.id IN (
+                            SELECT id FROM "{table}"
+                             WHERE id > %s AND ({not_null})
+                          ORDER BY id LIMIT %s)
+                     RETURNING t.id
+                    """, [last_id, chunk_size])
+                    ids = [row[0] for row in cr.fetchall()]
+                    cr.commit()
+                if not ids:
+                    break
+                migrated += len(ids)
+                last_id = max(ids)
+
+            with registry.cursor() as cr:
+                # Filas modificadas durante la copia por bloques, sin bloqueo
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env[self._name]._replay_overflow(table, log_table, names, payload)
+                cr.commit()
+
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['task.planner.ddl']._execute_ddl([f'LOCK TABLE "{table}" IN SHARE ROW EXCLUSIVE MODE'], cr=cr)
+                caught_up = env[self._name]._replay_overflow(table, log_table, names, payload)
+                env['ir.model.fields'].browse(column_fields.ids).write({'store': False, 'planner_storage': 'jsonb'})
+                env['task.planner.field.definition'].with_context(active_test=False).search([
+                    ('model', '=', model_name),
+                    ('name', 'in', names),
+                ]).write({'storage': 'jsonb'})
+                env['task.planner.ddl']._drop_columns_after_commit(table, names)
+                env['ir.model.fields']._refresh_planner_model(model_name)
+                cr.commit()
+        finally:
+            # DROP TRIGGER bloquea la tabla entera: se hace fuera de la
+            # transacción que retiene el bloqueo de escrituras
+            with registry.cursor() as cr:
+                env = api.Environment(cr, SUPERUSER_ID, {})
+                env['task.planner.table.maintenance']._drop_change_log(table, log_table)
+                cr.commit()
+
+        self.env.registry.clear_cache()
+        self.env.invalidate_all()
+        _logger.info("Columnas %s de %s pasadas a JSONB en %.1fs (%d filas, %d actualizadas al final)",
+                     ', '.join(names), table, time.monotonic() - start, migrated, caught_up)
+        return migrated
+
+    @api.model
+    def _replay_overflow(self, table, log_table, names, payload):
+        """Copia de nuevo a JSONB las filas registradas en la tabla de cambios"""
+        maintenance = self.env['task.planner.table.maintenance']
+        self.env.cr.execute(SKIP_CHANGE_LOG)
+        replayed = 0
+        while True:
+            ids = maintenance._pop_change_log(log_table)
+            if not ids:
+                return replayed
+            self.env.cr.execute(f"""
+                UPDATE "{table}" t
+                   SET dynamic_values = (COALESCE(t.dynamic_values, '{{}}'::jsonb) - %s::text[]) || {payload}
+                 WHERE t.id = ANY(%s)
+            """, [names, ids])
+            replayed += self.env.cr.rowcount
+
+
+class PlannerStorageReport(models.TransientModel):
+    _name = 'task.planner.storage.report'
+    _description = 'Informe de campos dinámicos dispersos'
+
+    threshold = fields.Float(
+        string='Umbral de relleno',
+        readonly=True,
+        default=lambda self: self.env['task.planner.storage.advisor']._get_sparse_threshold()
+    )
+    line_ids = fields.One2many('task.planner.storage.report.line', 'report_id', string='Columnas')
+
+    @api.model
+    def default_get(self, fields_list):
+        result = super().default_get(fields_list)
+        if 'line_ids' in fields_list:
+            Advisor = self.env['task.planner.storage.advisor']
+            result['line_ids'] = [
+                (0, 0, {
+                    'model': stats['model'],
+                    'field_name': stats['name'],
+                    'label': stats['label'],
+                    'rows': stats['rows'],
+                    'fill_rate': stats['fill_rate'] * 100.0,
+                    'avg_width': stats['avg_width'],
+                    'sparse': stats['sparse'],
+                    'to_migrate': stats['sparse'],
+                })
+                for model_name in PLANNER_MODELS
+                for stats in Advisor._get_column_stats(model_name)
+            ]
+        return result
+
+    def action_migrate(self):
+        """Pasa a JSONB las columnas marcadas, un modelo cada vez"""
+        self.ensure_one()
+        lines = self.line_ids.filtered('to_migrate')
+        if not lines:
+            raise UserError(_("Marque al menos una columna para migrar"))
+        Advisor = self.env['task.planner.storage.advisor']
+        for model_name in sorted(set(lines.mapped('model'))):
+            Advisor._migrate_to_overflow(
+                model_name, lines.filtered(lambda line: line.model == model_name).mapped('field_name'))
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'reload',
+        }
+
+
+class PlannerStorageReportLine(models.TransientModel):
+    _name = 'task.planner.storage.report.line'
+    _description = 'Relleno de una columna dinámica'
+
+    report_id = fields.Many2one('task.planner.storage.report', required=True, ondelete='cascade')
+    model = fields.Char(string='Modelo', readonly=True)
+    field_name = fields.Char(string='Campo', readonly=True)
+    label = fields.Char(string='Etiqueta', readonly=True)
+    rows = fields.Integer(string='Filas (estimadas)', readonly=True)
+    fill_rate = fields.Float(string='% relleno', digits=(16, 1), readonly=True)
+    avg_width = fields.Integer(string='Ancho medio (bytes)', readonly=True)
+    sparse = fields.Boolean(string='Dispersa', readonly=True)
+    to_migrate = fields.Boolean(string='Migrar a JSONB')
@@ -1,12 +1,10 @@
 from odoo import models, fields, api, _
 from odoo.exceptions import ValidationError, UserError
 from .boards import STATES
+from .ddl_executor import COLUMN_TYPES
 import logging
-import json
-from datetime import datetime
 import re
 from psycopg2.extensions import AsIs
-from datetime import datetime
 from lxml import etree
 
 _logger = logging.getLogger(__name__)
@@ -14,7 +12,9 @@ _logger = logging.getLogger(__name__)
 class SubtaskBoard(models.Model):
     _name = 'subtask.board'
     _description = 'Subtarea del Planificador de Actividades'
-    _inherit = ['mail.thread']
+    _inherit = ['mail.thread', 'task.planner.sequence.mixin', 'task.planner.dynamic.values.mixin']
+    _sequence_field = 'sequence_number'
+    _sequence_scope_field = 'task_id'
     
     # ===========================
     # FIELD DEFINITIONS
@@ -27,46 +27,25 @@ class SubtaskBoard(models.Model):
     drag = fields.Integer()
     files = fields.Many2many('ir.attachment', string="Archivos")
     state = fields.Selection(STATES, default="new", string="Estado", tracking=True)
-    field_info = fields.Text(string="Ingresar datos para el campo") 
     progress = fields.Integer(string="Progreso")
     completed_subtasks = fields.Integer(string="Subtareas Completadas")
     total_subtasks = fields.Integer(string="Total de Subtareas")
     
     # Relational fields
-    task_id = fields.Many2one('task.board', string='Parent Task', ondelete='cascade')
+    task_id = fields.Many2one('task.board', string='Parent Task', ondelete='cascade', index=True)
     person = fields.Many2one(
         'hr.employee', 
         string='Responsable',
         tracking=True,
-        domain="[('id', 'in', allowed_member_ids)]"
+        domain="[('planner_board_ids', '=', board_id)]"
     )
     activity_line_ids = fields.One2many('subtask.activity', 'subtask_id', string='Actividades')
     
-    # Dynamic fields management
-    dynamic_field_name = fields.Char(string="Technical Name")
-    dynamic_field_label = fields.Char(string="Display Label")
-    dynamic_field_type = fields.Selection([
-        ('char', 'Text'),
-        ('integer', 'Integer'),
-        ('float', 'Decimal'),
-        ('boolean', 'Boolean'),
-        ('date', 'Date'),
-        ('selection','Selection'),
-        ('datetime', 'Datetime'),
-        ],
-        string="Field Type"
-    )
-    
-    dynamic_fields_data = fields.Text(
-        string="Fields Configuration",
-        help="Stores configuration in JSON format"
-    )
-    
     # Computed/related fields
-    allowed_member_ids = fields.Many2many(
-        'hr.employee',
-        string='Allowed Members',
-        related='task_id.allowed_member_ids',
+    board_id = fields.Many2one(
+        'boards.planner',
+        string='Tablero',
+        related='task_id.department_id',
         readonly=True
     )
 
@@ -92,31 +71,6 @@ class SubtaskBoard(models.Model):
     help='Número secuencial automático para cada registro'
     )
 
-    @api.model_create_multi
-    def create(self, vals_list):
-        # Buscar si ya existe un registro con sequence_number = 1
-        existing_record = self.search([('sequence_number', '=', 1)], limit=1)
-
-        # Si no existe ningún registro con sequence_number = 1
-        if not existing_record:
-            # Asignar el valor 1 al primer registro de la lista
-            if vals_list:
-                vals_list[0]['sequence_number'] = 1
-
-            # Procesar el resto de registros con numeración secuencial normal
-            if len(vals_list) > 1:
-                max_sequence = self.search([], order='sequence_number desc', limit=1).sequence_number or 0
-                for vals in vals_list[1:]:
-                    max_sequence += 1
-                    vals['sequence_number'] = max_sequence
-        else:
-            # Numeración secuencial normal (cuando ya existe el registro con valor 1)
-            max_sequence = self.search([], order='sequence_number desc', limit=1).sequence_number or 0
-            for vals in vals_list:
-                max_sequence += 1
-                vals['sequence_number'] = max_sequence 
-        return super(SubtaskBoard, self).create(vals_list)
-
     @api.depends('person')
     def _compute_department_id(self):
         for record in self:
@@ -124,13 +78,15 @@ class SubtaskBoard(models.Model):
 
     def _compute_has_dynamic_fields(self):
         """Actualización optimizada del campo computado"""
-        dynamic_count = self.env['ir.model.fields'].search_count([
-            ('model', '=', self._name),
-            ('name', 'like', 'x_%'),
-            ('state', '=', 'manual')
-        ])
+        has_dynamic_fields = bool(self.env['ir.model.fields']._get_planner_dynamic_fields(self._name))
         for record in self:
-            record.has_dynamic_fields = bool(dynamic_count)
+            record.has_dynamic_fields = has_dynamic_fields
+
+    def unlink(self):
+        subtask_ids = self.ids
+        result = super().unlink()
+        self.env['subtask.activity']._drop_scoped_sequences(subtask_ids)
+        return result
 
     
     # ===========================
@@ -177,9 +133,6 @@ class SubtaskBoard(models.Model):
             'name': _("Subtask for %s") % self.task_id.name,
         }
     
-        if hasattr(self.task_id, 'allowed_member_ids'):
-            defaults['allowed_member_ids'] = [(6, 0, self.task_id.allowed_member_ids.ids)]
-    
         return {
             'name': _('New Subtask'),
             'type': 'ir.actions.act_window',
@@ -236,14 +189,14 @@ class SubtaskBoard(models.Model):
     # DYNAMIC FIELD CREATION METHODS
     # ===========================
 
-    def action_create_dynamic_field(self):
-        """Método para crear campos dinámicos con soporte para selección"""
+    def action_create_dynamic_field_wizard(self, field_name, field_label, field_type):
+        """Método llamado desde el wizard para crear campos dinámicos"""
         self.ensure_one()
-        if not all([self.dynamic_field_name, self.dynamic_field_type]):
+        if not all([field_name, field_type]):
             raise UserError(_("Field name and type are required"))
 
-        field_name = self._generate_valid_field_name(self.dynamic_field_name)
-        field_label = self.dynamic_field_label or self.dynamic_field_name.replace('_', ' ').title()
+        field_label = field_label or field_name.replace('_', ' ').title()
+        field_name = self._generate_valid_field_name(field_name)
 
         # Obtener opciones de selección del contexto si existen
         selection_values = self.env.context.get('selection_values', False)
@@ -253,16 +206,13 @@ class SubtaskBoard(models.Model):
             self._create_field_in_model(
                 field_name,
                 field_label,
-                self.dynamic_field_type,
+                field_type,
                 selection_values  # Pasar las opciones de selección
             )
 
-            # 2. Actualizar TODAS las subtareas existentes
-            all_subtasks = self.env['subtask.board'].search([])
-
-            # 3. Actualizar la vista
-            self._update_tree_view(field_name, field_label)
-            self._store_field_metadata(field_name, selection_values)
+            # 2. Actualizar la vista
+            self._store_field_metadata(field_name, field_label, field_type, selection_values)
+            self._update_tree_view(field_name, field_label, field_type)
 
             return {'type': 'ir.actions.client', 'tag': 'reload'}
 
@@ -297,57 +247,27 @@ class SubtaskBoard(models.Model):
         if field_type == 'selection' and selection_options:
             field_vals['selection'] = selection_options
 
-        self.env['ir.model.fields'].sudo().create(field_vals)
+        # La columna se crea antes que el campo para que el ALTER pase por
+        # el ejecutor de DDL y no por la inicialización del registro
         self._add_column_to_table(field_name, field_type)
+        self.env['ir.model.fields'].sudo().create(field_vals)
 
     def _add_column_to_table(self, field_name, field_type):
         """Add physical column to database"""
-        type_mapping = {
-            'char': 'varchar(255)',
-            'integer': 'integer',
-            'float': 'numeric(16,2)',
-            'boolean': 'boolean',
-            'date': 'date',
-            'datetime': 'timestamp',
-            'selection': 'varchar',
-        }
-        
-        if field_type not in type_mapping:
+        if field_type not in COLUMN_TYPES:
             raise UserError(_("Unsupported field type: %s") % field_type)
         
-        query = f"""
-            ALTER TABLE {self._table} 
-            ADD COLUMN IF NOT EXISTS {field_name} {type_mapping[field_type]}
-        """
-        self._cr.execute(query)
+        self.env['task.planner.ddl']._add_columns(self._table, [(field_name, COLUMN_TYPES[field_type])])
 
-    def _store_field_metadata(self, field_name, selection_values=False):
-        """Store field configuration in JSON incluyendo opciones de selección"""
-        try:
-            field_data = {
-                'name': field_name,
-                'label': self.dynamic_field_label,
-                'type': self.dynamic_field_type,
-                'created_at': datetime.now().isoformat(),  # Convertir a string ISO
-                'created_by': self.env.user.id,
-            }
-            
-            # Resto del código de serialización...
-            current_data = {}
-            if self.dynamic_fields_data:
-                try:
-                    current_data = json.loads(self.dynamic_fields_data)
-                except json.JSONDecodeError:
-                    current_data = {}
-            
-            current_data[field_name] = field_data
-            self.dynamic_fields_data = json.dumps(current_data)
-            
-        except Exception as e:
-            _logger.error("Metadata storage failed: %s", str(e))
-            raise UserError(_("Error storing field metadata: %s") % str(e))
+    def _store_field_metadata(self, field_name, field_label, field_type, selection_values=False):
+        """Registra la definición del campo para el grupo de la tarea"""
+        self.env['task.planner.field.definition']._register_definition(
+            self._name, field_name, field_label, field_type,
+            task=self.task_id,
+            selection_values=selection_values,
+        )
 
-    def _get_tree_widget_for_field(self):
+    def _get_tree_widget_for_field(self, field_type):
         """Get appropriate widget for field type"""
         widget_map = {
             'boolean': 'boolean',
@@ -357,10 +277,10 @@ class SubtaskBoard(models.Model):
             'float': 'float',
             'integer': 'integer',
         }
-        widget = widget_map.get(self.dynamic_field_type, '')
+        widget = widget_map.get(field_type, '')
         return f'widget="{widget}"' if widget else ''
 
-    def _update_tree_view(self, field_name, field_label):
+    def _update_tree_view(self, field_name, field_label, field_type):
         """Actualiza la vista tree y form de subtask.board"""
         try:
             # Obtener las vistas
@@ -372,7 +292,7 @@ class SubtaskBoard(models.Model):
             if not form_view:
                 raise UserError(_("No se encontró la vista 'task_planner.activity_planner_subtask_form'"))
     
-            widget_info = self._get_tree_widget_for_field() or ""
+            widget_info = self._get_tree_widget_for_field(field_type) or ""
     
             # Arch XML para la vista tree
             tree_arch = f"""
@@ -411,7 +331,7 @@ class SubtaskBoard(models.Model):
                 existing_form_view.unlink()
     
             # Crear vista tree
-            self.env['ir.ui.view'].create({
+            views = self.env['ir.ui.view'].create({
                 'name': f'subtask.board.tree.dynamic.{field_name}.{self.task_id.id}',
                 'model': 'subtask.board',
                 'arch': tree_arch,
@@ -421,7 +341,7 @@ class SubtaskBoard(models.Model):
             })
     
             # Crear vista form
-            self.env['ir.ui.view'].create({
+            views |= self.env['ir.ui.view'].create({
                 'name': f'subtask.board.form.dynamic.{field_name}.{self.task_id.id}',
                 'model': 'subtask.board',
                 'arch': form_arch,
@@ -429,6 +349,7 @@ class SubtaskBoard(models.Model):
                 'type': 'form',
                 'priority': 100,
             })
+            self.env['task.planner.field.definition']._link_views(self._name, field_name, views)
     
         except Exception as e:
             _logger.error("Error updating views: %s", str(e))
@@ -0,0 +1,361 @@
+from odoo import models, fields, api, SUPERUSER_ID, _
+from odoo.exceptions import UserError
+from .ir_model_fields import PLANNER_MODELS
+import logging
+import re
+import time
+
+_logger = logging.getLogger(__name__)
+
+# Límite de PostgreSQL de atributos por tabla (las columnas eliminadas cuentan)
+MAX_TABLE_COLUMNS = 1600
+
+# Sufijos de las tablas auxiliares de la reconstrucción
+REBUILD_SUFFIX = '__reclaim'
+LOG_SUFFIX = '__reclaim_log'
+
+
+class PlannerTableMaintenance(models.AbstractModel):
+    """Recuperación de huecos de columnas de las tablas con campos dinámicos.
+
+    PostgreSQL nunca reutiliza el hueco de una columna eliminada y el límite
+    de 1600 columnas los sigue contando. La reconstrucción copia la tabla a
+    una nueva sin huecos por bloques (cada bloque en su propia transacción),
+    registra con un disparador las filas que cambian mientras tanto y hace el
+    intercambio en una transacción corta con ``lock_timeout``.
+
+    Desde ``odoo shell``::
+
+        env['task.planner.table.maintenance']._get_slot_usage()
+        env['task.planner.table.maintenance']._rebuild_table('task_board')
+    """
+    _name = 'task.planner.table.maintenance'
+    _description = 'Mantenimiento de tablas de campos dinámicos'
+
+    @api.model
+    def _get_planner_tables(self):
+        return [self.env[model_name]._table for model_name in PLANNER_MODELS]
+
+    @api.model
+    def _get_slot_usage(self, tables=None):
+        """Uso de huecos de columnas por tabla.
+
+        ``slots`` es el mayor ``attnum`` (lo que cuenta para el límite),
+        ``dropped`` los huecos de columnas eliminadas y ``live`` las columnas
+        vigentes.
+        """
+        tables = tables or self._get_planner_tables()
+        self.env.cr.execute("""
+            SELECT c.relname,
+                   COALESCE(max(a.attnum), 0),
+                   count(*) FILTER (WHERE a.attisdropped),
+                   count(*) FILTER (WHERE NOT a.attisdropped),
+                   pg_total_relation_size(c.oid)
+              FROM pg_class c
+              JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum > 0
+             WHERE c.relname = ANY(%s)
+               AND c.relkind = 'r'
+               AND pg_table_is_visible(c.oid)
+          GROUP BY c.relname, c.oid
+          ORDER BY c.relname
+        """, [list(tables)])
+        return [{
+            'table': table,
+            'slots': slots,
+            'dropped': dropped,
+            'live': live,
+            'size': size,
+            'usage': 100.0 * slots / MAX_TABLE_COLUMNS,
+        } for table, slots, dropped, live, size in self.env.cr.fetchall()]
+
+    # --------------------------------------------
+    # COPY AND SWAP
+    # --------------------------------------------
+    @api.model
+    def _rebuild_table(self, table, chunk_size=None):
+        """Reconstruye la tabla sin huecos de columnas eliminadas.
+
+        Cada fase se ejecuta en su propio cursor y confirma su trabajo, de
+        modo que las lecturas y escrituras de la tabla sólo se bloquean
+        durante el intercambio final. Si algo falla (el intercambio se revierte
+        entero) se eliminan las tablas auxiliares y la original queda intacta.
+        """
+        if table not in self._get_planner_tables():
+            raise UserError(_("La tabla %s no es una tabla del planificador") % table)
+        chunk_size = chunk_size or int(self.env['ir.config_parameter'].sudo().get_param(
+            'task_planner.reclaim_chunk_size', 5000))
+        start = time.monotonic()
+        registry = self.env.registry
+        try:
+            with registry.cursor() as cr:
+                # El tamaño de la tabla se lee en otro cursor: su bloqueo
+                # impediría el intercambio si quedara en el de la petición
+                before = self._with_cr(cr)._get_slot_usage([table])
+                columns = self._with_cr(cr)._prepare_rebuild(table)
+                cr.commit()
+            copied = self._copy_in_chunks(table, columns, chunk_size)
+            with registry.cursor() as cr:
+                # Se aplican los cambios acumulados sin bloqueo para que el
+                # intercambio sólo tenga que aplicar los últimos
+                self._with_cr(cr)._replay_changes(table, columns)
+                cr.commit()
+            with registry.cursor() as cr:
+                foreign_keys = self._with_cr(cr)._swap_tables(table, columns)
+                cr.commit()
+        except Exception:
+            with registry.cursor() as cr:
+                self._with_cr(cr)._abort_rebuild(table)
+                cr.commit()
+            raise
+        with registry.cursor() as cr:
+            self._with_cr(cr)._validate_foreign_keys(foreign_keys)
+            cr.execute(f'ANALYZE "{table}"')
+            after = self._with_cr(cr)._get_slot_usage([table])
+            cr.commit()
+        _logger.info("Tabla %s reconstruida en %.1fs (%d filas): huecos %s -> %s",
+                     table, time.monotonic() - start, copied,
+                     before[0]['slots'] if before else '?', after[0]['slots'] if after else '?')
+        return after[0] if after else {}
+
+    def _with_cr(self, cr):
+        return self.with_env(api.Environment(cr, SUPERUSER_ID, {}))
+
+    @api.model
+    def _get_live_columns(self, table):
+        self.env.cr.execute("""
+            SELECT attname FROM pg_attribute
+             WHERE attrelid = %s::regclass AND attnum > 0 AND NOT attisdropped
+          ORDER BY attnum
+        """, [table])
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _prepare_rebuild(self, table):
+        """Crea la tabla nueva, la tabla de cambios y el disparador que la llena"""
+        cr = self.env.cr
+        new_table, log_table = table + REBUILD_SUFFIX, table + LOG_SUFFIX
+        cr.execute(f'DROP TABLE IF EXISTS "{new_table}"')
+        self._create_change_log(table, log_table)
+        # LIKE copia sólo las columnas vigentes: la tabla nueva no tiene huecos
+        cr.execute(f"""
+            CREATE TABLE "{new_table}" (LIKE "{table}"
+                INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING INDEXES
+                INCLUDING STORAGE INCLUDING COMMENTS)
+        """)
+        return self._get_live_columns(table)
+
+    @api.model
+    def _create_change_log(self, table, log_table):
+        """Crea la tabla de cambios y el disparador que registra los ids modificados.
+
+        Las escrituras de una transacción con ``SET LOCAL
+        task_planner.skip_change_log = 'on'`` no se registran: así la copia
+        de los valores no se anota a sí misma.
+        """
+        cr = self.env.cr
+        cr.execute(f'DROP TABLE IF EXISTS "{log_table}"')
+        cr.execute(f'CREATE UNLOGGED TABLE "{log_table}" (id integer PRIMARY KEY)')
+        cr.execute(f"""
+            CREATE OR REPLACE FUNCTION "{log_table}_fn"() RETURNS trigger AS $$
+            BEGIN
+                IF current_setting('task_planner.skip_change_log', true) = 'on' THEN
+                    RETURN NULL;
+                END IF;
+                IF TG_OP = 'DELETE' THEN
+                    INSERT INTO "{log_table}" VALUES (OLD.id) ON CONFLICT DO NOTHING;
+                ELSE
+                    INSERT INTO "{log_table}" VALUES (NEW.id) ON CONFLICT DO NOTHING;
+                END IF;
+                RETURN NULL;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        # CREATE TRIGGER espera a las escrituras en curso: toda fila modificada
+        # después queda registrada
+        self.env['task.planner.ddl']._execute_ddl([f"""
+            CREATE TRIGGER "{log_table}_trigger"
+                AFTER INSERT OR UPDATE OR DELETE ON "{table}"
+                FOR EACH ROW EXECUTE FUNCTION "{log_table}_fn"()
+        """])
+
+    @api.model
+    def _pop_change_log(self, log_table, batch_size=5000):
+        """Saca de la tabla de cambios un lote de ids pendientes"""
+        self.env.cr.execute(f"""
+            DELETE FROM "{log_table}"
+             WHERE id IN (SELECT id FROM "{log_table}" LIMIT %s)
+         RETURNING id
+        """, [batch_size])
+        return [row[0] for row in self.env.cr.fetchall()]
+
+    @api.model
+    def _drop_change_log(self, table, log_table):
+        cr = self.env.cr
+        # DROP TRIGGER bloquea la tabla entera: se espera con lock_timeout
+        self.env['task.planner.ddl']._execute_ddl([f'DROP TRIGGER IF EXISTS "{log_table}_trigger" ON "{table}"'])
+        cr.execute(f'DROP TABLE IF EXISTS "{log_table}"')
+        cr.execute(f'DROP FUNCTION IF EXISTS "{log_table}_fn"()')
+
+    def _copy_in_chunks(self, table, columns, chunk_size):
+        new_table = table + REBUILD_SUFFIX
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        copied, last_id = 0, 0
+        while True:
+            with self.env.registry.cursor() as cr:
+                cr.execute(f"""
+                    INSERT INTO "{new_table}" ({column_list})
+                    SELECT {column_list} FROM "{table}"
+                     WHERE id > %s ORDER BY id LIMIT %s
+                    RETURNING id
+                """, [last_id, chunk_size])
+                ids = [row[0] for row in cr.fetchall()]
+                cr.commit()
+            if not ids:
+                return copied
+            copied += len(ids)
+            last_id = max(ids)
+
+    @api.model
+    def _replay_changes(self, table, columns, batch_size=5000):
+        """Copia de nuevo las filas modificadas durante la reconstrucción"""
+        cr = self.env.cr
+        new_table, log_table = table + REBUILD_SUFFIX, table + LOG_SUFFIX
+        column_list = ', '.join(f'"{column}"' for column in columns)
+        replayed = 0
+        while True:
+            ids = self._pop_change_log(log_table, batch_size)
+            if not ids:
+                return replayed
+            cr.execute(f'DELETE FROM "{new_table}" WHERE id = ANY(%s)', [ids])
+            cr.execute(f"""
+                INSERT INTO "{new_table}" ({column_list})
+                SELECT {column_list} FROM "{table}" WHERE id = ANY(%s)
+            """, [ids])
+            replayed += len(ids)
+
+    @api.model
+    def _swap_tables(self, table, columns):
+        """Intercambia las tablas en una transacción corta.
+
+        Devuelve las claves foráneas recreadas como ``NOT VALID``, que se
+        validan después sin bloquear escrituras.
+        """
+        cr = self.env.cr
+        new_table, log_table = table + REBUILD_SUFFIX, table + LOG_SUFFIX
+        old_table = table + '__reclaim_old'
+        self.env['task.planner.ddl']._execute_ddl([f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE'])
+        if self._get_live_columns(table) != columns:
+            raise UserError(_("Las columnas de %s cambiaron durante la reconstrucción; vuelva a lanzarla") % table)
+        self._replay_changes(table, columns)
+
+        # Claves foráneas hacia la tabla y desde ella (LIKE no las copia)
+        cr.execute("""
+            SELECT conname, conrelid::regclass::text, conrelid = %s::regclass, pg_get_constraintdef(oid)
+              FROM pg_constraint
+             WHERE contype = 'f' AND (confrelid = %s::regclass OR conrelid = %s::regclass)
+        """, [table, table, table])
+        foreign_keys = []
+        for name, owner, outgoing, definition in cr.fetchall():
+            owner = table if outgoing else owner
+            if not outgoing:
+                cr.execute(f'ALTER TABLE {owner} DROP CONSTRAINT "{name}"')
+            foreign_keys.append((owner, name, definition))
+
+        # Índices de la tabla nueva que deben recuperar el nombre original
+        index_names = self._match_index_names(table, new_table)
+
+        cr.execute(f'ALTER TABLE "{table}" RENAME TO "{old_table}"')
+        cr.execute(f'ALTER TABLE "{new_table}" RENAME TO "{table}"')
+        cr.execute("""
+            SELECT seq.relname, att.attname
+              FROM pg_depend dep
+              JOIN pg_class seq ON seq.oid = dep.objid AND seq.relkind = 'S'
+              JOIN pg_attribute att ON att.attrelid = dep.refobjid AND att.attnum = dep.refobjsubid
+             WHERE dep.refobjid = %s::regclass AND dep.deptype = 'a'
+        """, [old_table])
+        for sequence, column in cr.fetchall():
+            cr.execute(f'ALTER SEQUENCE "{sequence}" OWNED BY "{table}"."{column}"')
+        cr.execute(f'DROP TABLE "{old_table}"')
+        cr.execute(f'DROP TABLE IF EXISTS "{log_table}"')
+        cr.execute(f'DROP FUNCTION IF EXISTS "{log_table}_fn"()')
+        for new_name, old_name in index_names:
+            cr.execute(f'ALTER INDEX "{new_name}" RENAME TO "{old_name}"')
+        for owner, name, definition in foreign_keys:
+            cr.execute(f'ALTER TABLE {owner} ADD CONSTRAINT "{name}" {definition} NOT VALID')
+        return foreign_keys
+
+    @api.model
+    def _match_index_names(self, table, new_table):
+        """Empareja los índices de la tabla nueva con los originales por definición"""
+        def normalized(name):
+            self.env.cr.execute("""
+                SELECT i.relname, pg_get_indexdef(i.oid)
+                  FROM pg_index x JOIN pg_class i ON i.oid = x.indexrelid
+                 WHERE x.indrelid = %s::regclass
+            """, [name])
+            return {
+                re.sub(r'INDEX \S+ ON \S+', 'INDEX ON', definition): index_name
+                for index_name, definition in self.env.cr.fetchall()
+            }
+        original, rebuilt = normalized(table), normalized(new_table)
+        return [(rebuilt[key], original[key]) for key in rebuilt if key in original]
+
+    @api.model
+    def _validate_foreign_keys(self, foreign_keys):
+        for owner, name, _definition in foreign_keys:
+            self.env.cr.execute(f'ALTER TABLE {owner} VALIDATE CONSTRAINT "{name}"')
+
+    @api.model
+    def _abort_rebuild(self, table):
+        self._drop_change_log(table, table + LOG_SUFFIX)
+        self.env.cr.execute(f'DROP TABLE IF EXISTS "{table}{REBUILD_SUFFIX}"')
+        _logger.warning("Reconstrucción de %s cancelada; tablas auxiliares eliminadas", table)
+
+
+class PlannerSlotReport(models.TransientModel):
+    _name = 'task.planner.slot.report'
+    _description = 'Informe de huecos de columnas'
+
+    line_ids = fields.One2many('task.planner.slot.report.line', 'report_id', string='Tablas')
+
+    @api.model
+    def default_get(self, fields_list):
+        result = super().default_get(fields_list)
+        if 'line_ids' in fields_list:
+            result['line_ids'] = [
+                (0, 0, {
+                    'table_name': usage['table'],
+                    'slots': usage['slots'],
+                    'dropped': usage['dropped'],
+                    'live': usage['live'],
+                    'size_mb': usage['size'] / 1024.0 / 1024.0,
+                    'usage': usage['usage'],
+                })
+                for usage in self.env['task.planner.table.maintenance']._get_slot_usage()
+            ]
+        return result
+
+
+class PlannerSlotReportLine(models.TransientModel):
+    _name = 'task.planner.slot.report.line'
+    _description = 'Huecos de columnas de una tabla'
+
+    report_id = fields.Many2one('task.planner.slot.report', required=True, ondelete='cascade')
+    table_name = fields.Char(string='Tabla', readonly=True)
+    slots = fields.Integer(string='Huecos usados', readonly=True)
+    dropped = fields.Integer(string='Columnas eliminadas', readonly=True)
+    live = fields.Integer(string='Columnas vigentes', readonly=True)
+    size_mb = fields.Float(string='Tamaño (MB)', digits=(16, 1), readonly=True)
+    usage = fields.Float(string='% del límite', digits=(16, 1), readonly=True)
+
+    def action_rebuild(self):
+        """Reconstruye la tabla de la línea para recuperar los huecos"""
+        self.ensure_one()
+        self.env['task.planner.table.maintenance']._rebuild_table(self.table_name)
+        return {
+            'name': _('Huecos de Columnas'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'task.planner.slot.report',
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -0,0 +1,43 @@
+from odoo.tests.common import TransactionCase, tagged
+
+
+@tagged('post_install', '-at_install')
+class TestDynamicValuesSearch(TransactionCase):
+    """Búsquedas sobre campos dinámicos guardados en ``dynamic_values``"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        model = cls.env['ir.model']._get('subtask.board')
+        cls.env['ir.model.fields'].create([{
+            'name': name,
+            'model_id': model.id,
+            'field_description': name,
+            'ttype': ttype,
+            'state': 'manual',
+            'store': False,
+            'planner_storage': 'jsonb',
+        } for name, ttype in [('x_test_done', 'boolean'), ('x_test_amount', 'float'), ('x_test_code', 'char')]])
+        Subtask = cls.env['subtask.board']
+        cls.first = Subtask.create({'name': 'Primera', 'x_test_done': True, 'x_test_amount': 3.0, 'x_test_code': 'abc'})
+        cls.second = Subtask.create({'name': 'Segunda', 'x_test_amount': 1.5})
+        cls.records = cls.first | cls.second
+
+    def _search(self, domain):
+        return self.env['subtask.board'].search([('id', 'in', self.records.ids)] + domain)
+
+    def test_search_equal(self):
+        self.assertEqual(self._search([('x_test_done', '=', True)]), self.first)
+        self.assertEqual(self._search([('x_test_done', '=', False)]), self.second)
+        self.assertEqual(self._search([('x_test_code', '=', 'abc')]), self.first)
+        self.assertEqual(self._search([('x_test_amount', '=', 3)]), self.first)
+
+    def test_search_in(self):
+        self.assertEqual(self._search([('x_test_done', 'in', [True])]), self.first)
+        self.assertEqual(self._search([('x_test_done', 'in', [False])]), self.second)
+        self.assertEqual(self._search([('x_test_amount', 'in', [3.0, 2.0])]), self.first)
+        self.assertEqual(self._search([('x_test_code', 'not in', ['abc'])]), self.second)
+
+    def test_search_compare(self):
+        self.assertEqual(self._search([('x_test_amount', '>', 2)]), self.first)
+        self.assertEqual(self._search([('x_test_code', 'ilike', 'AB')]), self.first)